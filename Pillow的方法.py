@@ -1,30 +1,2288 @@
+import time
+_MODULE_STARTED_AT = time.perf_counter()  # 启动跟踪的起点
+
 import tkinter as tk
 import random
 import os
-import time
-from PIL import Image, ImageDraw, ImageFont, ImageTk
+import math
+import heapq
+import itertools
+import bisect
+import json
+import hashlib
+import mmap
+import struct
+import select
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+import importlib
+import importlib.util
 import sys
+from collections import OrderedDict, deque
 
 
-class FixedTransparentErrorSimulator:
-    def __init__(self, total_duration_seconds=30, progress_update_interval_ms=100):
-        # 窗口与画布
-        self.root = tk.Tk()
-        self.root.attributes('-fullscreen', True)
-        self.root.attributes('-topmost', True)
+class _LazyModule:
+    """第一次访问属性时才真正 import，Pillow / NumPy 的导入因此推迟到窗口出现之后"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _resolve(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+
+Image = _LazyModule("PIL.Image")
+ImageDraw = _LazyModule("PIL.ImageDraw")
+ImageFont = _LazyModule("PIL.ImageFont")
+ImageTk = _LazyModule("PIL.ImageTk")
+# NumPy 可选，没有时走纯 Python 路径；有的话同样用到时才导入
+np = _LazyModule("numpy") if importlib.util.find_spec("numpy") is not None else None
+
+
+def _import_pillow():
+    for module in (Image, ImageDraw, ImageFont, ImageTk):
+        module._resolve()
+
+
+# -------------------- 启动阶段计时 -------------------- #
+class StartupTrace:
+    """按阶段记录启动耗时：mark(name) 记下距上一个标记的时间，report() 输出表格"""
+
+    def __init__(self, origin=None):
+        self.origin = _MODULE_STARTED_AT if origin is None else origin
+        self._last = self.origin
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self):
+        lines = [f"{'phase':<14}{'ms':>9}{'total ms':>11}"]
+        total = 0.0
+        for name, seconds in self.phases:
+            total += seconds
+            lines.append(f"{name:<14}{seconds * 1000:9.1f}{total * 1000:11.1f}")
+        return "\n".join(lines)
+
+
+# 错误滚动列所有画布项共用的 tag，滚动时整体 move 一次
+ERROR_LINE_TAG = "error_line"
+
+
+# -------------------- 大文件行源（按偏移读取 + 行偏移索引） -------------------- #
+class LineSource:
+    """
+    文本文件只保持一个打开的句柄，保存每行起始偏移（array('Q')，8 字节/行），读取某行时才按偏移读出并解码。
+    不做内存映射：文件在运行中被原地改写或截短时只会读到短数据，不会因 SIGBUS 崩溃，Windows 上也不妨碍编辑器保存。
+    行为与 readlines() + rstrip('\n\r') 一致（保留空行）；内存占用与文件内容大小无关。
+    persist_index=True 时索引写到同目录的 <文件名>.idx，文件大小和修改时间不变时直接读入。
+    background=True 时只同步扫描开头 FIRST_CHUNK 字节，其余在后台线程里接着建索引：
+    len() 只算结尾已经扫到的行，随扫描推进而增长，扫完后 indexed 置位。
+    """
+
+    INDEX_HEADER = struct.Struct("<8sQQ")
+    INDEX_MAGIC = b"LSIDX1\0\0"
+    CHUNK = 16 * 1024 * 1024
+    FIRST_CHUNK = 1024 * 1024
+
+    def __init__(self, path, persist_index=False, encoding="utf-8", base=None, background=False):
+        self.path = path
+        self.encoding = encoding
+        self.index_path = path + ".idx"
+        self._file = open(path, "rb")
+        self._lock = threading.Lock()  # 没有 os.pread 的平台上 seek + read 需要串行
+        st = os.fstat(self._file.fileno())
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.digest = None  # 建索引时读过的 [0, size) 的 sha1；从 .idx 读入索引时未知
+        self.indexed = threading.Event()
+        self._closing = False
+        self._indexer = None
+        self.offsets = self._load_index()
+        if self.offsets is None:
+            prefix = self._extends(base) if base is not None else None
+            if prefix is not None:
+                # 只是在末尾追加：沿用旧索引，从旧的最后一行（可能不完整）开始重新扫描
+                self.offsets = self._scan(base.offsets[-1], array("Q", base.offsets[:-1]), prefix, base.size)
+            elif background and self.size > self.FIRST_CHUNK:
+                # 先扫开头一块，前面的行马上可以显示；剩下的交给后台线程
+                self.offsets = self._scan(0, hasher=hashlib.sha1(), stop=self.FIRST_CHUNK)
+                self._indexer = threading.Thread(target=self._finish_index, args=(persist_index,),
+                                                 name="line-index", daemon=True)
+                self._indexer.start()
+                return
+            else:
+                self.offsets = self._scan(0, hasher=hashlib.sha1())
+            if persist_index:
+                self.save_index()
+        self.indexed.set()
+
+    def _finish_index(self, persist_index):
         try:
-            self.root.attributes('-transparentcolor', 'black')
-            self.root.configure(bg='black')
+            self._scan_more(self.offsets)
+        except (OSError, ValueError):
+            return  # 扫描途中被 close()
+        finally:
+            self.indexed.set()
+        if persist_index and not self._closing:
+            self.save_index()
+
+    def _extends(self, base):
+        """
+        当前文件是否是 base 的追加版本：旧长度以内的全部内容哈希不变。
+        是则返回已经喂过这段前缀的 sha1 对象，供继续扫描时接着计算；否则返回 None。
+        """
+        if base.digest is None or not len(base.offsets) or self.size < base.size:
+            return None
+        hasher = hashlib.sha1()
+        pos = 0
+        while pos < base.size:
+            chunk = self._read(pos, min(base.size, pos + self.CHUNK))
+            if not chunk:
+                return None
+            hasher.update(chunk)
+            pos += len(chunk)
+        return hasher if hasher.digest() == base.digest else None
+
+    def _read(self, start, end):
+        """读 [start, end) 的字节；文件已被截短时返回的数据更短（或为空），由调用方按普通内容处理"""
+        if end <= start:
+            return b""
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), end - start, start)
+        with self._lock:
+            self._file.seek(start)
+            return self._file.read(end - start)
+
+    def __len__(self):
+        n = len(self.offsets)
+        # 后台还在扫时，最后一个偏移那行的结尾还不知道
+        return n if self.indexed.is_set() else max(0, n - 1)
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        start = self.offsets[i]
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else self.size
+        return self._read(start, end).decode(self.encoding, errors="replace").rstrip("\n\r")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _scan(self, start, offsets=None, hasher=None, hashed=0, stop=None):
+        """
+        从 start（某行起始处）扫描到 stop（默认文件末尾），把每行起始偏移追加到 offsets 并返回。
+        hasher 已经喂过 [0, hashed) 时，扫描中把其后的字节继续喂进去，扫到文件末尾时得到整个文件的 digest。
+        没扫完时由 _scan_more 接着扫。
+        """
+        if offsets is None:
+            offsets = array("Q")
+        if start < self.size:
+            offsets.append(start)
+        self._scanned = start
+        self._hasher = hasher
+        self._hashed = hashed
+        self._scan_more(offsets, stop)
+        return offsets
+
+    def _scan_more(self, offsets, stop=None):
+        stop = self.size if stop is None else min(self.size, stop)
+        pos = self._scanned
+        hasher, hashed = self._hasher, self._hashed
+        while pos < stop:
+            if self._closing:
+                return
+            chunk = self._read(pos, min(stop, pos + self.CHUNK))
+            if not chunk:
+                pos = self.size  # 扫描途中文件变短，剩下的当作没有
+                hasher = None
+                break
+            end = pos + len(chunk)
+            if hasher is not None and end > hashed:
+                hasher.update(chunk[max(0, hashed - pos):])
+            if np is not None:
+                hits = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10) + (pos + 1)
+                offsets.extend(hits.astype(np.uint64).tolist())
+            else:
+                i = chunk.find(b"\n")
+                while i != -1:
+                    offsets.append(pos + i + 1)
+                    i = chunk.find(b"\n", i + 1)
+            pos = end
+        self._scanned = pos
+        if pos < self.size:
+            return
+        # 以换行结尾时最后一个偏移等于文件大小，不是一行
+        if offsets and offsets[-1] >= self.size:
+            offsets.pop()
+        if hasher is not None:
+            self.digest = hasher.digest()
+        self._hasher = None
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, size, mtime_ns = self.INDEX_HEADER.unpack(f.read(self.INDEX_HEADER.size))
+                if magic != self.INDEX_MAGIC or size != self.size or mtime_ns != self.mtime_ns:
+                    return None
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+                return offsets
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def save_index(self):
+        try:
+            with open(self.index_path, "wb") as f:
+                f.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, self.size, self.mtime_ns))
+                f.write(self.offsets.tobytes())
+        except OSError:
+            pass
+
+    def close(self):
+        self._closing = True
+        if self._indexer is not None:
+            self._indexer.join()
+        self._file.close()
+
+
+# -------------------- 文本热更新（后台线程监视 + UI 线程换入） -------------------- #
+def _inotify_fd(paths):
+    """Linux 上用 inotify 监视所在目录，有事件立即唤醒；其它平台返回 None，只靠轮询"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK)
+        if fd < 0:
+            return None
+        # IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        mask = 0x002 | 0x008 | 0x080 | 0x100
+        for d in {os.path.dirname(os.path.abspath(p)) for p in paths}:
+            libc.inotify_add_watch(fd, d.encode(), mask)
+        return fd
+    except Exception:
+        return None
+
+
+class CorpusWatcher:
+    """
+    后台线程按 (mtime, size) 轮询 error.txt / name.txt（Linux 上由 inotify 提前唤醒）。
+    文件变化时在线程里生成新的 LineSource（追加时只扫描新增部分），放进 ready 队列；
+    UI 线程取出后整体替换，动画不停顿，索引位置也不重置。
+    """
+
+    def __init__(self, paths, interval=0.5, persist_index=False):
+        self.paths = list(paths)
+        self.interval = float(interval)
+        self.persist_index = persist_index
+        self.ready = deque()
+        self._sources = {}
+        self._stamps = {p: self._stamp(p) for p in self.paths}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def track(self, path, source):
+        """登记当前正在使用的行源，作为下一次增量更新的基础"""
+        if isinstance(source, LineSource):
+            self._sources[path] = source
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        fd = _inotify_fd(self.paths)
+        try:
+            while not self._stop.is_set():
+                if fd is not None:
+                    readable, _, _ = select.select([fd], [], [], self.interval)
+                    if readable:
+                        try:
+                            os.read(fd, 65536)
+                        except OSError:
+                            pass
+                else:
+                    self._stop.wait(self.interval)
+                self.poll_once()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def poll_once(self):
+        for path in self.paths:
+            stamp = self._stamp(path)
+            if stamp is None or stamp == self._stamps.get(path):
+                continue
+            self._stamps[path] = stamp
+            try:
+                source = LineSource(path, persist_index=self.persist_index, base=self._sources.get(path))
+            except (OSError, ValueError):
+                continue
+            self._sources[path] = source
+            self.ready.append((path, source))
+
+
+# -------------------- 行图缓存（LRU） -------------------- #
+class LineRasterCache:
+    """
+    按 (text, font, size, color) 缓存已经渲染好的行图片，容量满时淘汰最久未使用的一项。
+    error.txt / name.txt 都是循环显示的，稳定滚动后每次取图都应命中缓存。
+    """
+
+    def __init__(self, capacity=512):
+        self.capacity = max(0, int(capacity))
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        # 只查询，不影响命中统计和 LRU 顺序
+        return key in self._items
+
+    def get(self, key):
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+# -------------------- 磁盘行图集（跨进程复用已渲染的行） -------------------- #
+_FILE_DIGESTS = {}
+
+
+def _file_digest(path):
+    """文件内容的 sha1，按 (路径, 大小, mtime) 记忆；没有路径（内置字体）时返回固定值"""
+    if not path:
+        return "builtin"
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (path, st.st_size, st.st_mtime_ns)
+    digest = _FILE_DIGESTS.get(stamp)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _FILE_DIGESTS[stamp] = h.hexdigest()
+    return digest
+
+
+class RasterAtlas:
+    """
+    把渲染好的行图（RGBA）顺序追加进若干原始像素页文件，index.json 记录每行所在的页、偏移和尺寸。
+    下次启动按 (字体内容, 字号, 颜色, 文本) 的哈希查找，从内存映射的页里直接切出图片，不经过 FreeType。
+    每条记录属于一个来源（error / name）；来源的文本文件或字体变化后，该来源的旧记录全部作废。
+    总大小超过 max_bytes 时按整页淘汰最久未用的页。
+    """
+
+    INDEX_NAME = "index.json"
+    VERSION = 1
+
+    def __init__(self, directory, max_bytes=64 << 20, page_bytes=4 << 20):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        # 淘汰以页为单位，页不能比上限的四分之一还大
+        self.page_bytes = max(1 << 16, min(int(page_bytes), self.max_bytes // 4))
+        self.entries = {}  # key -> [page, offset, w, h, tick, source]
+        self.pages = {}  # page -> 字节数
+        self.sources = {}  # source -> 签名
+        self.tick = 0
+        self.hits = 0
+        self.misses = 0
+        self._maps = {}  # page -> mmap
+        self._writer = None
+        self._write_page = None
+        self._dirty = False
+        self._faces = {}  # 字体路径 -> 内容 sha1；登记时算一次，取键时不再 stat 字体文件
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _page_path(self, page):
+        return os.path.join(self.directory, f"page-{page:04d}.rgba")
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.directory, self.INDEX_NAME), encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                raise ValueError("atlas version")
+            pages = {int(k): v for k, v in data["pages"].items()}
+            # 页文件比索引短（写入中断）时整页作废
+            self.pages = {k: v for k, v in pages.items()
+                          if os.path.exists(self._page_path(k)) and os.path.getsize(self._page_path(k)) >= v}
+            self.entries = {k: e for k, e in data["entries"].items() if e[0] in self.pages}
+            self.sources = data.get("sources", {})
+            self.tick = int(data.get("tick", 0))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.entries, self.pages, self.sources = {}, {}, {}
+
+    def register_font(self, font):
+        """重新计算字体文件的 digest 并记住；字体文件可能已变化时（启动、热更新）调用"""
+        path = getattr(font, "path", None)
+        digest = self._faces[path] = _file_digest(path)
+        return digest
+
+    def key(self, text, font, font_size, color):
+        size = font_size if font_size is not None else getattr(font, "size", 0)
+        path = getattr(font, "path", None)
+        digest = self._faces.get(path)
+        if digest is None:
+            digest = self.register_font(font)
+        face = f"{digest}#{getattr(font, 'index', 0)}"
+        raw = "\0".join((face, str(size), ",".join(map(str, color)), text))
+        return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def set_source(self, source, signature):
+        """来源签名变化（文本文件或字体改了）时丢弃该来源的全部记录"""
+        if self.sources.get(source) == signature:
+            return
+        self.entries = {k: e for k, e in self.entries.items() if e[5] != source}
+        self.sources[source] = signature
+        self._dirty = True
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        page, offset, w, h = entry[:4]
+        n = w * h * 4
+        mm = self._maps.get(page)
+        if mm is None or len(mm) < offset + n:
+            if page == self._write_page:
+                self._writer.flush()
+            if mm is not None:
+                mm.close()
+            with open(self._page_path(page), "rb") as f:
+                mm = self._maps[page] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.tick += 1
+        entry[4] = self.tick
+        self.hits += 1
+        self._dirty = True
+        return Image.frombuffer("RGBA", (w, h), mm[offset:offset + n], "raw", "RGBA", 0, 1)
+
+    def put(self, key, img, source):
+        if key in self.entries:
+            return
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+        data = img.tobytes()
+        if self._writer is None or self.pages[self._write_page] + len(data) > self.page_bytes:
+            self._open_page()
+        offset = self.pages[self._write_page]
+        self._writer.write(data)
+        self.pages[self._write_page] = offset + len(data)
+        self.tick += 1
+        self.entries[key] = [self._write_page, offset, img.width, img.height, self.tick, source]
+        self._dirty = True
+        self._evict()
+
+    def _open_page(self):
+        if self._writer is not None:
+            self._writer.close()
+        page = max(self.pages, default=-1) + 1
+        self._writer = open(self._page_path(page), "wb")
+        self._write_page = page
+        self.pages[page] = 0
+
+    def _evict(self):
+        while sum(self.pages.values()) > self.max_bytes and len(self.pages) > 1:
+            last_used = {page: 0 for page in self.pages if page != self._write_page}
+            for entry in self.entries.values():
+                if entry[0] in last_used:
+                    last_used[entry[0]] = max(last_used[entry[0]], entry[4])
+            self._drop_page(min(last_used, key=last_used.get))
+
+    def _drop_page(self, page):
+        self.entries = {k: e for k, e in self.entries.items() if e[0] != page}
+        del self.pages[page]
+        mm = self._maps.pop(page, None)
+        if mm is not None:
+            mm.close()
+        try:
+            os.remove(self._page_path(page))
+        except OSError:
+            pass
+
+    def save(self):
+        """写回索引（先写临时文件再替换，中途退出不会留下半个索引）"""
+        if self._writer is not None:
+            self._writer.flush()
+        if not self._dirty:
+            return
+        # 已经没有记录引用的页顺便删掉
+        used = {e[0] for e in self.entries.values()}
+        for page in [p for p in self.pages if p not in used and p != self._write_page]:
+            self._drop_page(page)
+        data = {"version": self.VERSION, "tick": self.tick, "sources": self.sources,
+                "pages": {str(k): v for k, v in self.pages.items()}, "entries": self.entries}
+        path = os.path.join(self.directory, self.INDEX_NAME)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def close(self):
+        self.save()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for mm in self._maps.values():
+            mm.close()
+        self._maps.clear()
+
+    def stats(self):
+        return {"entries": len(self.entries), "pages": len(self.pages), "bytes": sum(self.pages.values()),
+                "hits": self.hits, "misses": self.misses}
+
+
+# -------------------- 可见行环形缓冲 / 图片引用表 -------------------- #
+class LineRing:
+    """
+    错误列可见行：画布项 id、内容坐标 y、行高放在 array 里，图片引用放在等长列表里，按环形使用。
+    append / popleft / head 都是 O(1)，满了整体扩容一倍。没有画布项时 id 记为 -1，取出时还原为 None。
+    """
+
+    __slots__ = ("_ids", "_ys", "_heights", "_imgs", "_head", "_count")
+
+    def __init__(self, capacity=64):
+        capacity = max(1, int(capacity))
+        self._ids = array("q", bytes(8 * capacity))
+        self._ys = array("q", bytes(8 * capacity))
+        self._heights = array("l", bytes(array("l").itemsize * capacity))
+        self._imgs = [None] * capacity
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _at(self, slot):
+        item_id = self._ids[slot]
+        return (None if item_id < 0 else item_id), self._ys[slot], self._imgs[slot], self._heights[slot]
+
+    def __iter__(self):
+        cap = len(self._imgs)
+        for i in range(self._count):
+            yield self._at((self._head + i) % cap)
+
+    def head(self):
+        """最顶部一行 (id, y, 图片, 行高)；为空时抛 IndexError"""
+        if not self._count:
+            raise IndexError("head of empty LineRing")
+        return self._at(self._head)
+
+    def append(self, item_id, y, img, height):
+        cap = len(self._imgs)
+        if self._count == cap:
+            self._grow()
+            cap = len(self._imgs)
+        slot = (self._head + self._count) % cap
+        self._ids[slot] = -1 if item_id is None else item_id
+        self._ys[slot] = int(y)
+        self._heights[slot] = int(height)
+        self._imgs[slot] = img
+        self._count += 1
+
+    def popleft(self):
+        item = self.head()
+        self._imgs[self._head] = None
+        self._head = (self._head + 1) % len(self._imgs)
+        self._count -= 1
+        return item
+
+    def _grow(self):
+        items = list(self)
+        cap = len(self._imgs) * 2
+        self._ids = array("q", bytes(8 * cap))
+        self._ys = array("q", bytes(8 * cap))
+        self._heights = array("l", bytes(array("l").itemsize * cap))
+        self._imgs = [None] * cap
+        self._head = 0
+        self._count = 0
+        for item in items:
+            self.append(*item)
+
+
+class ImageRefTable:
+    """
+    PhotoImage 引用表：按对象身份计数，hold / release 都是 O(1)。
+    同一张缓存图片被多行同时使用时计数累加，最后一行释放后才真正放开引用。
+    """
+
+    __slots__ = ("_refs",)
+
+    def __init__(self):
+        self._refs = {}  # id(obj) -> [obj, count]
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __contains__(self, obj):
+        return id(obj) in self._refs
+
+    def hold(self, obj):
+        slot = self._refs.get(id(obj))
+        if slot is None:
+            self._refs[id(obj)] = [obj, 1]
+        else:
+            slot[1] += 1
+
+    def release(self, obj):
+        key = id(obj)
+        slot = self._refs.get(key)
+        if slot is None:
+            return
+        slot[1] -= 1
+        if slot[1] <= 0:
+            del self._refs[key]
+
+
+# -------------------- 后台预渲染（线程池 + 有界队列） -------------------- #
+class RasterPrefetcher:
+    """
+    在线程池里提前把接下来要显示的行渲染成 PIL 图片，结果按顺序放在最多 depth 项的队列里。
+    Tk 线程取用时只需做 PhotoImage 转换；队列里找不到（跳行、文件已换）时整队作废，
+    由调用方同步渲染这一行，再从当前位置重新提交。
+    """
+
+    def __init__(self, render, depth=6, workers=2, pool=None):
+        self.render = render
+        self.depth = max(1, int(depth))
+        # 多个屏幕可以共用一个线程池，各自保留自己的队列
+        self._owns_pool = pool is None
+        self._pool = pool or ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="raster")
+        self._queue = deque()  # (index, text, future)
+        self.hits = 0
+        self.misses = 0
+
+    def has_room(self):
+        return len(self._queue) < self.depth
+
+    def submit(self, index, text):
+        self._queue.append((index, text, self._pool.submit(self.render, text)))
+
+    def take(self, index, text):
+        for pos, (qindex, qtext, future) in enumerate(self._queue):
+            if qindex == index and qtext == text:
+                for _ in range(pos + 1):
+                    self._queue.popleft()
+                self.hits += 1
+                try:
+                    return future.result()
+                except Exception:
+                    return None
+        # 队列里都是过期的行：留着的话 has_room 永远为假，后面再也提交不了新的
+        self.misses += 1
+        self.clear()
+        return None
+
+    def clear(self):
+        for _, _, future in self._queue:
+            future.cancel()
+        self._queue.clear()
+
+    def shutdown(self):
+        self.clear()
+        if self._owns_pool:
+            self._pool.shutdown(wait=False)
+
+
+# -------------------- 系统字体索引（扫描一次，按实际字符挑字体） -------------------- #
+FONT_INDEX_VERSION = 1
+_FONT_SUFFIXES = (".ttf", ".ttc", ".otf", ".otc")
+# 界面上固定出现的字符，挑字体时与文本采样一起计入
+UI_CHARS = "数据删除进度0123456789%!"
+
+
+def _font_dirs():
+    home = os.path.expanduser("~")
+    if sys.platform.startswith("win"):
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA", os.path.join(home, "AppData", "Local"))
+        return [os.path.join(windir, "Fonts"), os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    elif sys.platform.startswith("darwin"):
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    else:
+        data_home = os.environ.get("XDG_DATA_HOME", os.path.join(home, ".local", "share"))
+        return [os.path.join(data_home, "fonts"), os.path.join(home, ".fonts"),
+                "/usr/share/fonts", "/usr/local/share/fonts"]
+
+
+def _merge_ranges(ranges):
+    """[(起, 止)] 排序并合并相邻区间，展平成 [起0, 止0, 起1, 止1, ...]"""
+    flat = []
+    for start, end in sorted(ranges):
+        if flat and start <= flat[-1] + 1:
+            flat[-1] = max(flat[-1], end)
+        else:
+            flat += [start, end]
+    return flat
+
+
+def _parse_cmap(data, offset):
+    """读 cmap 子表，返回覆盖的码位区间；优先完整 Unicode（格式 12），其次 BMP（格式 4）"""
+    _, count = struct.unpack_from(">HH", data, offset)
+    subtables = {}
+    for i in range(count):
+        platform, encoding, sub = struct.unpack_from(">HHI", data, offset + 4 + i * 8)
+        fmt = struct.unpack_from(">H", data, offset + sub)[0]
+        subtables.setdefault((platform in (0, 3), fmt), offset + sub)
+    pos = subtables.get((True, 12))
+    if pos is not None:
+        groups = struct.unpack_from(">I", data, pos + 12)[0]
+        return [struct.unpack_from(">II", data, pos + 16 + i * 12) for i in range(groups)]
+    pos = subtables.get((True, 4))
+    if pos is None:
+        return []
+    seg = struct.unpack_from(">H", data, pos + 6)[0] // 2
+    ends = struct.unpack_from(f">{seg}H", data, pos + 14)
+    starts = struct.unpack_from(f">{seg}H", data, pos + 16 + seg * 2)
+    # 以段为单位近似覆盖（段内个别码位可能映射到缺字形），末尾的 0xFFFF 哨兵段去掉
+    return [(s, e) for s, e in zip(starts, ends) if s != 0xFFFF]
+
+
+def _parse_name(data, offset):
+    """name 表：(家族名, 样式名)，优先 Windows 平台英文名"""
+    _, count, strings = struct.unpack_from(">HHH", data, offset)
+    found = {}
+    for i in range(count):
+        platform, _, language, name_id, length, pos = struct.unpack_from(">6H", data, offset + 6 + i * 12)
+        if name_id not in (1, 2):
+            continue
+        raw = data[offset + strings + pos:offset + strings + pos + length]
+        text = raw.decode("utf-16-be", "ignore") if platform in (0, 3) else raw.decode("latin-1")
+        rank = 0 if (platform, language) == (3, 0x409) else 1 if platform == 3 else 2
+        if (name_id, rank) not in found:
+            found[(name_id, rank)] = text
+    pick = lambda nid: next((found[(nid, r)] for r in range(3) if (nid, r) in found), "")
+    return pick(1), pick(2)
+
+
+def _read_exact(f, offset, size):
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise struct.error("truncated font file")
+    return data
+
+
+def _scan_font_file(path):
+    """
+    解析 sfnt 表，返回每个字形面的 {index, family, style, ranges}；TTC 逐个面解析。
+    只按偏移读表目录和 cmap、name 两张表，不读字形数据（CJK 字体动辄几十 MB）。
+    """
+    with open(path, "rb") as f:
+        head = _read_exact(f, 0, 12)
+        if head[:4] == b"ttcf":
+            count = struct.unpack_from(">I", head, 8)[0]
+            offsets = struct.unpack(f">{count}I", _read_exact(f, 12, count * 4))
+        else:
+            offsets = (0,)
+        faces = []
+        tables_read = {}  # TTC 的各个面常常共用同一张 cmap / name 表
+        for index, base in enumerate(offsets):
+            count = struct.unpack(">H", _read_exact(f, base + 4, 2))[0]
+            directory = _read_exact(f, base + 12, count * 16)
+            tables = {}
+            for i in range(count):
+                tag, _, table, length = struct.unpack_from(">4sIII", directory, i * 16)
+                tables[tag] = (table, length)
+            if b"cmap" not in tables:
+                continue
+            for tag in (b"cmap", b"name"):
+                if tag in tables and tables[tag] not in tables_read:
+                    tables_read[tables[tag]] = _read_exact(f, *tables[tag])
+            family, style = _parse_name(tables_read[tables[b"name"]], 0) if b"name" in tables else ("", "")
+            faces.append({"index": index, "family": family, "style": style,
+                          "ranges": _merge_ranges(_parse_cmap(tables_read[tables[b"cmap"]], 0))})
+    return faces
+
+
+def _covers(flat, code):
+    pos = bisect.bisect_right(flat, code)
+    # 落在某个 [起, 止] 里：要么恰好是起点之后的奇数位置，要么正好等于止
+    return pos % 2 == 1 or (pos > 0 and flat[pos - 1] == code)
+
+
+def _corpus_charset(paths, limit=1 << 18):
+    """从每个文本文件开头采样，返回出现过的字符集合"""
+    chars = set(UI_CHARS)
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                chars.update(f.read(limit).decode("utf-8", "ignore"))
+        except OSError:
+            pass
+    return {ch for ch in chars if not ch.isspace() and unicodedata.category(ch)[0] != "C"}
+
+
+class FontIndex:
+    """
+    系统字体目录扫描一次，每个字形面的字符覆盖区间写入 JSON 索引。
+    之后启动只 stat 记录过的目录，目录没有变化就直接用索引；有变化时只重新解析新增或改动的文件。
+    background=True 时重新扫描放到后台线程，构造立即返回：扫完之前 best() 用已有的索引
+    （首次运行时为空，由调用方退回候选列表），扫完后整体换入并写盘，ready 置位。
+    """
+
+    def __init__(self, path=".font_index.json", dirs=None, background=False):
+        self.path = path
+        self.dirs = list(dirs) if dirs is not None else _font_dirs()
+        self.files = {}  # 文件路径 -> {"stamp": "大小:mtime", "faces": [...]}
+        self.dir_stamps = {}  # 目录 -> mtime_ns
+        self.scanned = 0
+        self.scan_seconds = 0.0
+        self.ready = threading.Event()
+        self._load()
+        if not self._stale():
+            self.ready.set()
+        elif background:
+            threading.Thread(target=self.refresh, name="font-index", daemon=True).start()
+        else:
+            self.refresh()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != FONT_INDEX_VERSION or data.get("roots") != self.dirs:
+            return
+        self.files = data.get("files", {})
+        self.dir_stamps = data.get("dirs", {})
+
+    def _stale(self):
+        if not self.dir_stamps:
+            return True
+        for directory, stamp in self.dir_stamps.items():
+            try:
+                if os.stat(directory).st_mtime_ns != stamp:
+                    return True
+            except OSError:
+                return True
+        return any(os.path.isdir(d) and d not in self.dir_stamps for d in self.dirs)
+
+    def refresh(self):
+        """遍历字体目录；大小与 mtime 都没变的文件沿用旧结果，其余重新解析。结果建好后一次换入"""
+        try:
+            self._refresh()
+        finally:
+            self.ready.set()
+
+    def _refresh(self):
+        t0 = time.perf_counter()
+        files, dir_stamps = {}, {}
+        for root_dir in self.dirs:
+            for directory, _, names in os.walk(root_dir):
+                try:
+                    dir_stamps[directory] = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                for name in names:
+                    if not name.lower().endswith(_FONT_SUFFIXES):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    stamp = f"{st.st_size}:{st.st_mtime_ns}"
+                    entry = self.files.get(path)
+                    if entry is None or entry["stamp"] != stamp:
+                        try:
+                            faces = _scan_font_file(path)
+                        except (OSError, struct.error):
+                            faces = []
+                        entry = {"stamp": stamp, "faces": faces}
+                        self.scanned += 1
+                    files[path] = entry
+        self.files, self.dir_stamps = files, dir_stamps
+        self.scan_seconds += time.perf_counter() - t0
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        data = {"version": FONT_INDEX_VERSION, "roots": self.dirs, "dirs": self.dir_stamps, "files": self.files}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def faces(self):
+        for path, entry in self.files.items():
+            for face in entry["faces"]:
+                yield path, face
+
+    def coverage(self, face, chars):
+        return sum(_covers(face["ranges"], ord(ch)) for ch in chars)
+
+    def best(self, chars, prefer=()):
+        """
+        返回覆盖 chars 最多的 (路径, 面序号, 家族名)；覆盖相同时优先 prefer 里靠前的文件、常规字重、非等宽。
+        一个字体都没有时返回 None。
+        """
+        chars = set(chars)
+        prefer = [os.path.basename(p).lower() for p in prefer]
+        best_key, best = None, None
+        for path, face in self.faces():
+            name = os.path.basename(path).lower()
+            style = face["style"].lower()
+            key = (self.coverage(face, chars),
+                   -(prefer.index(name) if name in prefer else len(prefer)),
+                   style in ("regular", "normal", "book", "roman", ""),
+                   "mono" not in face["family"].lower(),
+                   -face["index"])
+            if best_key is None or key > best_key:
+                best_key, best = key, (path, face["index"], face["family"])
+        return best
+
+    def stats(self):
+        faces = list(self.faces())
+        return {
+            "files": len(self.files),
+            "faces": len(faces),
+            "cjk_faces": sum(_covers(f["ranges"], 0x4E00) and _covers(f["ranges"], 0x9664) for _, f in faces),
+            "block_faces": sum(_covers(f["ranges"], 0x2588) for _, f in faces),
+            "scanned": self.scanned,
+            "scan_seconds": self.scan_seconds,
+        }
+
+
+# -------------------- 字体注册表（每个进程只解析/加载一次） -------------------- #
+def _font_candidates():
+    if sys.platform.startswith("win"):
+        return [
+            r"C:\Windows\Fonts\msyh.ttc",
+            r"C:\Windows\Fonts\msyhbd.ttf",
+            r"C:\Windows\Fonts\simhei.ttf",
+            r"C:\Windows\Fonts\segoeui.ttf",
+        ]
+    elif sys.platform.startswith("darwin"):
+        return [
+            "/System/Library/Fonts/STHeiti Medium.ttc",
+            "/Library/Fonts/Arial.ttf",
+        ]
+    else:
+        return [
+            "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        ]
+
+
+class FontRegistry:
+    """
+    字体路径只探测一次，每个 (path, size, index) 只打开一次 TTC/TTF，之后共享同一个 FreeTypeFont。
+    配了字体索引时按文本里实际出现的字符挑覆盖最全的字体，否则按固定候选列表。
+    stats() 给出加载次数、命中次数和累计加载耗时。
+    """
+
+    def __init__(self, candidates=None):
+        self._candidates = candidates
+        self._resolved = False
+        self._path = None
+        self._index = 0
+        self._family = None
+        self._font_index = None
+        self._chars = None
+        self._fonts = {}
+        self._default = None
+        self.loads = 0
+        self.hits = 0
+        self.load_seconds = 0.0
+        self.load_times = {}
+
+    def use_index(self, font_index, chars):
+        """改用字体索引按 chars 挑字体；已经解析过的结果作废，下次 resolve 重新挑选。"""
+        self._font_index = font_index
+        self._chars = set(chars)
+        self._resolved = False
+
+    def resolve(self):
+        """返回选中的字体路径（没有则为 None），结果缓存。"""
+        if not self._resolved:
+            candidates = self._candidates if self._candidates is not None else _font_candidates()
+            best = self._font_index.best(self._chars, prefer=candidates) if self._font_index is not None else None
+            if best is not None:
+                self._path, self._index, self._family = best
+            else:
+                for path in candidates:
+                    if os.path.exists(path):
+                        self._path, self._index = path, 0
+                        break
+            self._resolved = True
+        return self._path
+
+    def family(self):
+        """选中字体的家族名（仅字体索引可知），供 Tk 文字使用"""
+        self.resolve()
+        return self._family
+
+    def get(self, path, size, index=0):
+        """按 (path, size, index) 取共享字体；加载失败返回 None（失败结果同样缓存，不再重试）。"""
+        key = (path, int(size), int(index))
+        if key in self._fonts:
+            self.hits += 1
+            return self._fonts[key]
+        t0 = time.perf_counter()
+        try:
+            font = ImageFont.truetype(path, key[1], index=key[2])
         except Exception:
-            self.root.configure(bg='black')
-        self.root.overrideredirect(True)
+            font = None
+        elapsed = time.perf_counter() - t0
+        self._fonts[key] = font
+        self.loads += 1
+        self.load_seconds += elapsed
+        self.load_times[key] = elapsed
+        return font
 
-        self.screen_width = self.root.winfo_screenwidth()
-        self.screen_height = self.root.winfo_screenheight()
+    def default(self):
+        if self._default is None:
+            try:
+                self._default = ImageFont.load_default()
+            except Exception:
+                self._default = None
+        return self._default
 
-        self.canvas = tk.Canvas(self.root, bg='black', highlightthickness=0,
-                                width=self.screen_width, height=self.screen_height)
-        self.canvas.pack()
+    def load(self, size=16):
+        path = self.resolve()
+        if path:
+            font = self.get(path, size, self._index)
+            if font is not None:
+                return font
+        return self.default()
+
+    def stats(self):
+        return {
+            "path": self._path,
+            "index": self._index,
+            "family": self._family,
+            "fonts": len(self._fonts),
+            "loads": self.loads,
+            "hits": self.hits,
+            "load_seconds": self.load_seconds,
+            "load_times": {f"{p}#{i}@{sz}": t for (p, sz, i), t in self.load_times.items()},
+        }
+
+
+FONT_REGISTRY = FontRegistry()
+
+
+# -------------------- 字形图集（逐字形光栅化一次，NumPy 拼行） -------------------- #
+def _needs_shaping(ch):
+    """组合符、从右到左文字、印度/东南亚文字等需要整串排版的字符"""
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ("Mn", "Mc", "Me", "Cf", "Cc", "Cs"):
+        return True
+    if unicodedata.bidirectional(ch) in ("R", "AL", "AN"):
+        return True
+    return 0x0900 <= ord(ch) < 0x1000
+
+
+class GlyphAtlas:
+    """
+    每个 (字形, 字体, 字号) 只走一次 FreeType，得到 alpha 掩码和字形框；拼一行时按缓存的步进与字距
+    把掩码逐个叠进 NumPy 缓冲区，不再对整行做 FreeType 排版。
+    结果与 render_line_raster 同尺寸、同位置。遇到需要复杂排版的字符时 compose 返回 None，由调用方退回 Pillow。
+    字形光栅化持锁进行（FreeType face 不能多线程共用），拼行本身不加锁，预渲染线程可以直接调用。
+    """
+
+    def __init__(self, font):
+        self.font = ImageFont.truetype(font.path, font.size, index=getattr(font, "index", 0))
+        self._glyphs = {}  # ch -> (mask, left, top, right, bottom, advance)，复杂字符为 None
+        self._kerning = {}
+        self._lock = threading.Lock()
+        self.lines = 0
+        self.fallbacks = 0
+
+    def _glyph(self, ch):
+        glyph = self._glyphs.get(ch, False)
+        if glyph is not False:
+            return glyph
+        with self._lock:
+            if ch in self._glyphs:
+                return self._glyphs[ch]
+            if _needs_shaping(ch):
+                glyph = None
+            else:
+                left, top, right, bottom = self.font.getbbox(ch)
+                mask = Image.new("L", (max(0, right - left), max(0, bottom - top)), 0)
+                if mask.width and mask.height:
+                    ImageDraw.Draw(mask).text((-left, -top), ch, font=self.font, fill=255)
+                glyph = (np.asarray(mask), left, top, right, bottom, self.font.getlength(ch))
+            self._glyphs[ch] = glyph
+            return glyph
+
+    def _kern(self, a, b):
+        pair = a + b
+        k = self._kerning.get(pair)
+        if k is None:
+            with self._lock:
+                k = self.font.getlength(pair) - self._glyphs[a][5] - self._glyphs[b][5]
+            self._kerning[pair] = k
+        return k
+
+    def compose(self, text, color, pad_x=6, pad_y=3):
+        """返回 RGBA 图片；text 含复杂字符时返回 None"""
+        placed = []
+        pen = 0.0
+        prev = None
+        for ch in text:
+            glyph = self._glyph(ch)
+            if glyph is None:
+                self.fallbacks += 1
+                return None
+            if prev is not None:
+                pen += self._kern(prev, ch)
+            placed.append((round(pen), glyph))
+            pen += glyph[5]
+            prev = ch
+        left = min(0, min(x + g[1] for x, g in placed))
+        right = max(x + g[3] for x, g in placed)
+        top = min(g[2] for _, g in placed)
+        bottom = max(g[4] for _, g in placed)
+        w, h = right - left, bottom - top
+        if w <= 0 or h <= 0:
+            return None
+        buf = np.zeros((h + pad_y * 2, w + pad_x * 2), dtype=np.uint8)
+        for x, (mask, gl, gt, _, _, _) in placed:
+            if not mask.size:
+                continue
+            # 与 Pillow 在 (pad_x, pad_y) 处绘制时相同的位置，超出图片的部分裁掉
+            x0, y0 = pad_x + x + gl, pad_y + gt
+            if x0 < 0 or y0 < 0:
+                mask = mask[max(0, -y0):, max(0, -x0):]
+                x0, y0 = max(0, x0), max(0, y0)
+            dst = buf[y0:y0 + mask.shape[0], x0:x0 + mask.shape[1]]
+            np.maximum(dst, mask[:dst.shape[0], :dst.shape[1]], out=dst)
+        alpha = color[3] if len(color) > 3 else 255
+        if alpha != 255:
+            buf = ((buf.astype(np.uint16) * alpha + 127) // 255).astype(np.uint8)
+        img = Image.new("RGBA", (buf.shape[1], buf.shape[0]), tuple(color[:3]) + (0,))
+        img.putalpha(Image.fromarray(buf, "L"))
+        self.lines += 1
+        return img
+
+
+# -------------------- 故障效果（NumPy 整块变形，每行预生成若干变体） -------------------- #
+GLITCH_LEVELS = 3
+
+
+def _shift_x(a, dx):
+    """沿横向平移 dx 像素（正数向右），空出的部分补 0"""
+    out = np.zeros_like(a)
+    if dx > 0:
+        out[:, dx:] = a[:, :-dx]
+    elif dx < 0:
+        out[:, :dx] = a[:, -dx:]
+    else:
+        out[...] = a
+    return out
+
+
+class GlitchEffects:
+    """
+    错误行的故障效果：扫描线撕裂、RGB 分离、块状损坏，都是对 RGBA 数组的整块 NumPy 操作。
+    每个 (行, 强度档) 一次生成 variants 个变体并缓存，之后显示时只是挑一个；强度档和出现概率随进度上升。
+    缓存未命中时的生成受每帧 CPU 预算限制：本帧预算用完就先显示原图，留到后面的帧再生成。
+    """
+
+    def __init__(self, variants=4, budget_ms=4.0, frame_seconds=1 / 60, capacity=256, seed=None):
+        self.variants = max(1, int(variants))
+        self.budget = None if budget_ms is None else budget_ms / 1000.0
+        self.frame_seconds = frame_seconds
+        self.capacity = capacity
+        self.seed = (0 if seed is None else int(seed)) & 0xFFFFFFFF
+        self._cache = OrderedDict()  # (行键, 档位) -> [PIL 变体, ...]
+        # 挑选用独立的随机源，开关效果不改变滚动与文件名的随机序列
+        self._rng = random.Random(seed)
+        self._frame_end = None
+        self._spent = 0.0
+        self.hits = 0
+        self.generated = 0
+        self.deferred = 0
+        self.generate_seconds = 0.0
+
+    @staticmethod
+    def level(percent):
+        return min(GLITCH_LEVELS, (int(percent) * GLITCH_LEVELS + 99) // 100)
+
+    def pick(self, key, percent, now, render):
+        """
+        返回 (档位, 变体序号, 图片)；这一行不做效果或本帧预算不足时返回 None。
+        key 为 _raster_key；render() 只在需要生成变体时调用，给出原始行图。
+        """
+        level = self.level(percent)
+        if level == 0 or self._rng.random() >= percent / 125.0:
+            return None
+        cache_key = (key, level)
+        frames = self._cache.get(cache_key)
+        if frames is None:
+            if not self._has_budget(now):
+                self.deferred += 1
+                return None
+            t0 = time.perf_counter()
+            frames = self._generate(key, render(), level)
+            elapsed = time.perf_counter() - t0
+            self._spent += elapsed
+            self.generate_seconds += elapsed
+            self.generated += 1
+            self._cache[cache_key] = frames
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+        index = self._rng.randrange(len(frames))
+        return level, index, frames[index]
+
+    def _has_budget(self, now):
+        if self.budget is None:
+            return True
+        if self._frame_end is None or now >= self._frame_end:
+            self._frame_end = now + self.frame_seconds
+            self._spent = 0.0
+        return self._spent < self.budget
+
+    def _generate(self, key, img, level):
+        text, _, size, color = key
+        # 变形只由 行内容 + 档位 + seed 决定，离屏渲染和导出的结果可复现
+        digest = hashlib.sha1(f"{text}\0{size}\0{color}".encode("utf-8", "surrogatepass")).digest()
+        rng = np.random.default_rng([self.seed, int.from_bytes(digest[:4], "little"), level])
+        base = np.asarray(img.convert("RGBA"))
+        return [Image.fromarray(self._distort(base, level, rng), "RGBA") for _ in range(self.variants)]
+
+    @staticmethod
+    def _distort(base, level, rng):
+        h, w = base.shape[:2]
+        if h < 2 or w < 4:
+            return base.copy()
+
+        # 扫描线撕裂：每行一个横向偏移，整张图一次 gather
+        offsets = np.zeros(h, dtype=np.intp)
+        for _ in range(level):
+            y0 = int(rng.integers(0, h))
+            offsets[y0:y0 + int(rng.integers(1, max(2, h // 3) + 1))] = rng.integers(-4 * level, 4 * level + 1)
+        cols = np.arange(w)[None, :] - offsets[:, None]
+        out = base[np.arange(h)[:, None], np.clip(cols, 0, w - 1)]
+        out[(cols < 0) | (cols >= w)] = 0
+
+        # RGB 分离：预乘 alpha 后红通道左移、蓝通道右移，再按合并后的 alpha 还原
+        dx = int(rng.integers(1, 2 * level + 1))
+        alpha = out[..., 3].astype(np.uint32)
+        pre = out[..., :3].astype(np.uint32) * alpha[..., None] // 255
+        merged = np.maximum(np.maximum(_shift_x(alpha, -dx), _shift_x(alpha, dx)), alpha)
+        rgb = np.stack((_shift_x(pre[..., 0], -dx), pre[..., 1], _shift_x(pre[..., 2], dx)), axis=-1)
+        rgb = np.minimum(rgb * 255 // np.maximum(merged, 1)[..., None], 255)
+        out = np.dstack((rgb, merged)).astype(np.uint8)
+
+        # 块状损坏：把附近的一块搬过来，一半的块再降低色深
+        if w >= 16:
+            for _ in range(2 * level):
+                bw = int(rng.integers(6, max(7, min(60, w // 4))))
+                x0 = int(rng.integers(0, w - bw))
+                y0 = int(rng.integers(0, h))
+                y1 = min(h, y0 + int(rng.integers(2, h + 1)))
+                src = int(np.clip(x0 + rng.integers(-3 * bw, 3 * bw + 1), 0, w - bw))
+                block = out[y0:y1, src:src + bw].copy()
+                if rng.random() < 0.5:
+                    block[..., :3] &= 0xE0
+                    block[..., 3] = (block[..., 3] >> 6) * 85
+                out[y0:y1, x0:x0 + bw] = block
+        return out
+
+    def __len__(self):
+        return len(self._cache)
+
+    def stats(self):
+        return {
+            "entries": len(self._cache),
+            "variants": self.variants,
+            "hits": self.hits,
+            "generated": self.generated,
+            "deferred": self.deferred,
+            "generate_seconds": self.generate_seconds,
+        }
+
+
+# -------------------- 进度时钟（只在百分比变化时唤醒） -------------------- #
+EASINGS = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: 1 - (1 - t) * (1 - t),
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+}
+
+
+class ProgressClock:
+    """
+    把经过的秒数映射为 0~100 的整数百分比。
+    duration：不含停顿的总时长；easing：EASINGS 中的曲线名或 [0,1]->[0,1] 的单调函数；
+    stalls：[(percent, seconds), ...]，到达该百分比后原地停顿 seconds 秒。
+    所有结果只由 elapsed 算出，事件循环迟到也不会累积误差。
+    """
+
+    def __init__(self, duration, easing="linear", stalls=()):
+        self.duration = max(0.001, float(duration))
+        self.easing = EASINGS[easing] if isinstance(easing, str) else easing
+        self.stalls = sorted((int(p), float(sec)) for p, sec in stalls if float(sec) > 0)
+        # 曲线时间上首次到达每个百分比的时刻（不含停顿）
+        self._reach = [self._solve(q) for q in range(101)]
+
+    def _percent_of_curve(self, c):
+        x = min(1.0, max(0.0, c / self.duration))
+        return min(100, int(self.easing(x) * 100 + 1e-9))
+
+    def _solve(self, q):
+        if q <= 0:
+            return 0.0
+        lo, hi = 0.0, self.duration
+        for _ in range(60):
+            mid = (lo + hi) / 2
+            if self._percent_of_curve(mid) >= q:
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+    def _curve_time(self, elapsed):
+        offset = 0.0
+        for pct, hold in self.stalls:
+            reach = self._reach[min(100, pct)] + offset
+            if elapsed < reach:
+                break
+            if elapsed < reach + hold:
+                return reach - offset
+            offset += hold
+        return elapsed - offset
+
+    def percent_at(self, elapsed):
+        return self._percent_of_curve(self._curve_time(elapsed))
+
+    def time_of_percent(self, q):
+        """到达百分比 q 的时刻（含之前的停顿）"""
+        q = max(0, min(100, int(q)))
+        return self._reach[q] + sum(hold for pct, hold in self.stalls if pct < q)
+
+    def next_change_at(self, elapsed):
+        """下一次百分比变化的时刻；已到 100% 时返回 None"""
+        p = self.percent_at(elapsed)
+        if p >= 100:
+            return None
+        return self.time_of_percent(p + 1)
+
+    @property
+    def total_seconds(self):
+        return self.time_of_percent(100)
+
+
+# -------------------- 场景文件（预编译为按时间排序的扁平事件数组） -------------------- #
+# 阶段里没写的字段沿用上一阶段；第一阶段沿用这里的默认值（即原来写死的节奏）
+SCENARIO_DEFAULTS = {"seconds": 300.0, "easing": "linear", "hold": 0.0, "scroll_ms": [300, 900],
+                     "names_per_second": 3, "error_color": "#fe1926"}
+SCENARIO_END_DEFAULTS = {"percent_color": "#ffffff", "loop_seconds": 60.0}
+
+
+def _parse_color(text, where):
+    value = str(text).lstrip("#")
+    if len(value) != 6:
+        raise ValueError(f"{where}: color must look like #rrggbb, got {text!r}")
+    try:
+        return int(value, 16)
+    except ValueError:
+        raise ValueError(f"{where}: color must look like #rrggbb, got {text!r}") from None
+
+
+def _is_number(value):
+    """JSON/TOML 里的有限数字（bool 虽是 int 的子类，但不算）"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Scenario:
+    """
+    声明式场景：phases 依次描述进度从上一阶段的百分比走到 to 的时长、曲线、到达后的停顿，
+    以及这一阶段的滚动间隔、每秒文件名数量和错误行颜色；end 描述 100% 之后的状态。
+    构造时即校验，错误以 ValueError 报出具体位置。compile() 生成 CompiledScenario。
+    """
+
+    PHASE_KEYS = set(SCENARIO_DEFAULTS) | {"to"}
+    END_KEYS = set(SCENARIO_END_DEFAULTS) | {"scroll_ms", "names_per_second", "error_color"}
+
+    def __init__(self, data, name="scenario"):
+        self.name = name
+        if not isinstance(data, dict):
+            raise ValueError(f"{name}: top level must be a table/object")
+        self.seed = data.get("seed")
+        if self.seed is not None and not _is_integer(self.seed):
+            raise ValueError(f"{name}: 'seed' must be an integer")
+        phases = data.get("phases")
+        if not isinstance(phases, list) or not phases:
+            raise ValueError(f"{name}: 'phases' must be a non-empty list")
+        self.phases = []
+        current = dict(SCENARIO_DEFAULTS, hold=0.0)
+        last_to = 0
+        for i, phase in enumerate(phases):
+            where = f"{name}: phases[{i}]"
+            if not isinstance(phase, dict):
+                raise ValueError(f"{where} must be a table/object")
+            unknown = set(phase) - self.PHASE_KEYS
+            if unknown:
+                raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+            # 停顿只属于声明它的阶段，不向后沿用
+            current = {**current, "hold": 0.0, **phase}
+            self.phases.append(self._check_phase(current, last_to, where))
+            last_to = current["to"]
+        if last_to != 100:
+            raise ValueError(f"{name}: the last phase must end at to = 100")
+        end = data.get("end", {})
+        if not isinstance(end, dict):
+            raise ValueError(f"{name}: 'end' must be a table/object")
+        unknown = set(end) - self.END_KEYS
+        if unknown:
+            raise ValueError(f"{name}: end: unknown keys {sorted(unknown)}")
+        # 结束状态沿用最后一阶段的写法，再套上 end 里给出的字段
+        overrides = {k: v for k, v in end.items() if k in self.PHASE_KEYS}
+        self.end = self._check_phase({**current, "seconds": 0.0, "hold": 0.0, **overrides}, 100, f"{name}: end")
+        self.end["percent_color"] = _parse_color(end.get("percent_color", SCENARIO_END_DEFAULTS["percent_color"]),
+                                                 f"{name}: end.percent_color")
+        loop = end.get("loop_seconds", SCENARIO_END_DEFAULTS["loop_seconds"])
+        if not _is_number(loop) or loop < 0:
+            raise ValueError(f"{name}: end.loop_seconds must be a number >= 0")
+        self.end["loop_seconds"] = float(loop)
+
+    @staticmethod
+    def _check_phase(phase, last_to, where):
+        to = phase.get("to")
+        if not _is_integer(to) or not last_to <= to <= 100:
+            raise ValueError(f"{where}: 'to' must be an integer between {last_to} and 100")
+        if not isinstance(phase["easing"], str) or phase["easing"] not in EASINGS:
+            raise ValueError(f"{where}: easing must be one of {sorted(EASINGS)}")
+        seconds, hold = phase["seconds"], phase["hold"]
+        if not (_is_number(seconds) and _is_number(hold)) or seconds < 0 or hold < 0:
+            raise ValueError(f"{where}: seconds and hold must be numbers >= 0")
+        seconds, hold = float(seconds), float(hold)
+        scroll = phase["scroll_ms"]
+        if scroll is not None:
+            if not (isinstance(scroll, list) and len(scroll) == 2 and all(map(_is_number, scroll))
+                    and 1 <= scroll[0] <= scroll[1]):
+                raise ValueError(f"{where}: scroll_ms must be [min, max] milliseconds with 1 <= min <= max, "
+                                 f"or null to stop scrolling")
+            scroll = (int(scroll[0]), int(scroll[1]))
+        names = phase["names_per_second"]
+        if not _is_integer(names) or not 0 <= names <= 1000:
+            raise ValueError(f"{where}: names_per_second must be an integer between 0 and 1000")
+        return {"to": to, "seconds": seconds, "easing": phase["easing"], "hold": hold, "scroll_ms": scroll,
+                "names_per_second": names, "error_color": _parse_color(phase["error_color"], where)}
+
+    @classmethod
+    def load(cls, path):
+        """按扩展名读 .toml（Python 3.11+ 自带 tomllib）或 .json"""
+        if path.lower().endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:
+                raise ValueError(f"{path}: TOML scenarios need Python 3.11+; use JSON instead") from None
+            with open(path, "rb") as f:
+                try:
+                    data = tomllib.load(f)
+                except tomllib.TOMLDecodeError as exc:
+                    raise ValueError(f"{path}: {exc}") from None
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                except ValueError as exc:
+                    raise ValueError(f"{path}: {exc}") from None
+        return cls(data, name=path)
+
+    def compile(self, seed=None):
+        """所有随机抽取在这里一次做完；seed 为 None 时用场景里的 seed，再没有就是随机"""
+        return CompiledScenario(self, seed if self.seed is None else self.seed)
+
+
+class CompiledScenario:
+    """
+    编译结果：times（相对开始的秒）、kinds、values 三个等长数组，按 (时刻, 类型) 排序；
+    values 对百分比事件是百分比，对颜色事件是 0xRRGGBB，其余为 0。
+    运行时只需一个游标顺着走；[loop_from, 末尾) 是 100% 之后的尾段，走完后整体平移 loop_seconds 重复。
+    同时提供 ProgressClock 的查询接口（percent_at / next_change_at / total_seconds），供导出与回放计算时长。
+    """
+
+    PERCENT, COLOR, SCROLL, NAME, END = range(5)
+    KIND_NAMES = ("percent", "color", "scroll", "name", "end")
+
+    def __init__(self, scenario, seed=None):
+        t0 = time.perf_counter()
+        self.seed = seed
+        rng = random.Random(seed)
+        events = []
+        self.phase_spans = []
+        start, percent = 0.0, 0
+        next_scroll = next_batch = 0.0
+        color = None
+        for phase in scenario.phases:
+            if phase["error_color"] != color:
+                color = phase["error_color"]
+                events.append((start, self.COLOR, color))
+            events += self._percent_events(start, percent, phase)
+            stop = start + phase["seconds"] + phase["hold"]
+            next_scroll = self._scroll_events(events, rng, phase, next_scroll, stop)
+            next_batch = self._name_events(events, rng, phase, next_batch, stop)
+            self.phase_spans.append((start, stop, percent, phase["to"]))
+            start, percent = stop, phase["to"]
+        # 最后一阶段的停顿结束后进入结束状态
+        end_at = start
+        end = scenario.end
+        if end["error_color"] != color:
+            events.append((end_at, self.COLOR, end["error_color"]))
+        events.append((end_at, self.END, end["percent_color"]))
+        events.sort()
+        self.loop_from = len(events)
+        self.loop_seconds = 0.0
+        if end["loop_seconds"] > 0:
+            tail = []
+            loop_end = end_at + end["loop_seconds"]
+            self._scroll_events(tail, rng, end, next_scroll, loop_end)
+            self._name_events(tail, rng, end, next_batch, loop_end)
+            if tail:
+                tail.sort()
+                events += tail
+                self.loop_seconds = end["loop_seconds"]
+        self.times = array("d", (e[0] for e in events))
+        self.kinds = array("B", (e[1] for e in events))
+        self.values = array("l", (e[2] for e in events))
+        self._percent_times = array("d", (e[0] for e in events if e[1] == self.PERCENT))
+        self._percent_values = array("B", (e[2] for e in events if e[1] == self.PERCENT))
+        self.end_at = end_at
+        self.compile_seconds = time.perf_counter() - t0
+
+    def __len__(self):
+        return len(self.times)
+
+    @staticmethod
+    def _percent_events(start, percent, phase):
+        """阶段内每个整数百分比首次到达的时刻；seconds 为 0 时是一次跳变"""
+        to, seconds = phase["to"], phase["seconds"]
+        if to == percent:
+            return []
+        if seconds <= 0:
+            return [(start, CompiledScenario.PERCENT, to)]
+        easing = EASINGS[phase["easing"]]
+        events = []
+        span = to - percent
+        for q in range(percent + 1, to + 1):
+            target = (q - percent) / span
+            lo, hi = 0.0, 1.0
+            for _ in range(50):
+                mid = (lo + hi) / 2
+                if easing(mid) + 1e-9 >= target:
+                    hi = mid
+                else:
+                    lo = mid
+            events.append((start + hi * seconds, CompiledScenario.PERCENT, q))
+        return events
+
+    @staticmethod
+    def _scroll_events(events, rng, phase, next_scroll, stop):
+        if phase["scroll_ms"] is None:
+            return max(next_scroll, stop)
+        lo, hi = phase["scroll_ms"]
+        while next_scroll < stop:
+            events.append((next_scroll, CompiledScenario.SCROLL, 0))
+            next_scroll += rng.randint(lo, hi) / 1000.0
+        return next_scroll
+
+    @staticmethod
+    def _name_events(events, rng, phase, next_batch, stop):
+        """与原节奏相同：每秒一批，批内 names_per_second 个随机毫秒偏移；显示哪一行由运行时按顺序决定"""
+        while next_batch < stop:
+            for off in sorted(rng.randint(0, 999) for _ in range(phase["names_per_second"])):
+                events.append((next_batch + off / 1000.0, CompiledScenario.NAME, 0))
+            next_batch += 1.0
+        return next_batch
+
+    def percent_at(self, elapsed):
+        i = bisect.bisect_right(self._percent_times, elapsed)
+        return self._percent_values[i - 1] if i else 0
+
+    def next_change_at(self, elapsed):
+        i = bisect.bisect_right(self._percent_times, elapsed)
+        return self._percent_times[i] if i < len(self._percent_times) else None
+
+    @property
+    def total_seconds(self):
+        return self.end_at
+
+    def describe(self):
+        """离线检查用的摘要：各阶段时段、事件数、编译耗时"""
+        counts = [0] * len(self.KIND_NAMES)
+        for kind in self.kinds:
+            counts[kind] += 1
+        reach = self._percent_times[-1] if len(self._percent_times) else 0.0
+        lines = [f"100% at {reach:.2f}s, end state at {self.end_at:.2f}s, {len(self)} events "
+                 f"({', '.join(f'{n}={c}' for n, c in zip(self.KIND_NAMES, counts))}), "
+                 f"compiled in {self.compile_seconds * 1000:.1f} ms"]
+        for i, (start, stop, p0, p1) in enumerate(self.phase_spans):
+            lines.append(f"  phase {i}: {start:8.2f}s - {stop:8.2f}s  {p0:3d}% -> {p1:3d}%")
+        if self.loop_seconds:
+            lines.append(f"  after 100%: {len(self) - self.loop_from} events repeating every {self.loop_seconds:g}s")
+        return "\n".join(lines)
+
+
+# -------------------- 统一定时器（最小堆 + 单个 after） -------------------- #
+class DeadlineScheduler:
+    """
+    所有动画截止时间放在一个最小堆里，只用一个 root.after 对准最早的那个。
+    call_later / call_at 返回句柄，cancel 为惰性删除（作废项超过一半时重建堆，内存有界），
+    cancel_all 用于退出。root 为 None 时不挂 after，由调用方用 run_due(now) 驱动（虚拟时钟）。
+    time_scale：clock 每真实秒走过的秒数（回放加速时 >1），换算 after 的真实毫秒与插桩的延迟时用。
+    某个回调抛异常不会打断同一轮的其它回调，也不会让定时器停摆：有窗口时交给
+    root.report_callback_exception（与 Tk 自己的 after 回调一致），没有窗口时本轮跑完后重新抛出第一个异常。
+    """
+
+    def __init__(self, root=None, clock=time.monotonic, time_scale=1.0):
+        self.root = root
+        self.clock = clock
+        self.time_scale = float(time_scale)
+        self._heap = []
+        self._seq = itertools.count()
+        self._cancelled = 0
+        self._after_id = None
+        self._armed_for = None
+        self._running = False
+        self.probe = None  # TimerProbe，开启插桩时记录每次触发
+        self.current_deadline = None  # 正在执行的回调的计划时刻（逻辑时间，与实际触发的抖动无关）
+        self.errors = 0
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def call_later(self, delay_ms, callback, *args, name=None):
+        return self.call_at(self.clock() + max(0, delay_ms) / 1000.0, callback, *args, name=name)
+
+    def call_at(self, deadline, callback, *args, name=None):
+        # 句柄：[deadline, seq, callback, args, name]，callback 置 None 即作废
+        entry = [deadline, next(self._seq), callback, args, name or getattr(callback, "__name__", "callback")]
+        heapq.heappush(self._heap, entry)
+        if not self._running and (self._armed_for is None or deadline < self._armed_for):
+            self._arm()
+        return entry
+
+    def cancel(self, entry):
+        if entry is None or entry[2] is None:
+            return
+        entry[2] = None
+        self._cancelled += 1
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def cancel_all(self):
+        for entry in self._heap:
+            entry[2] = None
+        self._heap = []
+        self._cancelled = 0
+        if self._after_id is not None and self.root is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+        self._after_id = None
+        self._armed_for = None
+
+    def next_deadline(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+        return self._heap[0][0] if self._heap else None
+
+    def run_as(self, deadline, callback, *args):
+        """立即执行 callback，执行期间 current_deadline 为 deadline：同步触发的第一次回调与定时触发的行为一致"""
+        previous = self.current_deadline
+        self.current_deadline = deadline
+        try:
+            return callback(*args)
+        finally:
+            self.current_deadline = previous
+
+    def run_due(self, now=None):
+        """触发所有截止时间 <= now 的回调，返回触发个数；本轮新加入的项留到下一轮"""
+        now = self.clock() if now is None else now
+        limit = next(self._seq)
+        fired = 0
+        failure = None
+        self._running = True
+        try:
+            while self._heap and self._heap[0][0] <= now and self._heap[0][1] < limit:
+                entry = heapq.heappop(self._heap)
+                callback = entry[2]
+                if callback is None:
+                    self._cancelled -= 1
+                    continue
+                entry[2] = None
+                self.current_deadline = entry[0]
+                fired_at = self.clock() if self.probe is not None else None
+                t0 = time.perf_counter()
+                try:
+                    callback(*entry[3])
+                except Exception as exc:
+                    self.errors += 1
+                    if self.root is not None:
+                        self.root.report_callback_exception(type(exc), exc, exc.__traceback__)
+                    elif failure is None:
+                        failure = exc
+                if self.probe is not None:
+                    # 延迟按真实时间记录，与回放倍速无关
+                    self.probe.record(entry[4], entry[0] / self.time_scale, fired_at / self.time_scale,
+                                      time.perf_counter() - t0)
+                fired += 1
+        finally:
+            self._running = False
+            self.current_deadline = None
+        if failure is not None:
+            raise failure
+        return fired
+
+    def _arm(self):
+        if self.root is None:
+            return
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        deadline = self.next_deadline()
+        self._armed_for = deadline
+        if deadline is None:
+            return
+        delay = max(0, int(math.ceil((deadline - self.clock()) / self.time_scale * 1000)))
+        self._after_id = self.root.after(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._after_id = None
+        self._armed_for = None
+        try:
+            self.run_due()
+        finally:
+            # 无论本轮出了什么错，都要对准下一个截止时间，否则所有动画一起停住
+            self._arm()
+
+
+# -------------------- 定时插桩（触发延迟 / 执行耗时） -------------------- #
+class TimerProbe:
+    """
+    按回调名记录：计划触发时刻与实际触发时刻之差（after 延迟）以及回调执行耗时。
+    每个回调只保留最近 window 个样本，summary() 给出 p50/p95/p99/max（毫秒）。
+    """
+
+    def __init__(self, window=2048):
+        self.window = int(window)
+        self._late = {}
+        self._exec = {}
+        self.counts = {}
+
+    def record(self, name, intended, actual, exec_seconds):
+        if name not in self._late:
+            self._late[name] = deque(maxlen=self.window)
+            self._exec[name] = deque(maxlen=self.window)
+            self.counts[name] = 0
+        self._late[name].append((actual - intended) * 1000.0)
+        self._exec[name].append(exec_seconds * 1000.0)
+        self.counts[name] += 1
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(values)
+        last = len(ordered) - 1
+
+        def pick(q):
+            return ordered[min(last, int(round(q * last)))]
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+    def summary(self):
+        return {
+            name: {
+                "count": self.counts[name],
+                "late_ms": self._percentiles(self._late[name]),
+                "exec_ms": self._percentiles(self._exec[name]),
+            }
+            for name in sorted(self._late)
+        }
+
+    def format_hud(self):
+        lines = [f"{'callback':<26} late p50/p95/p99 ms    exec p50/p95/p99 ms"]
+        for name, row in self.summary().items():
+            late = row["late_ms"]; run = row["exec_ms"]
+            lines.append(f"{name[:26]:<26} {late['p50']:6.1f}/{late['p95']:6.1f}/{late['p99']:6.1f}"
+                         f"   {run['p50']:5.2f}/{run['p95']:5.2f}/{run['p99']:5.2f}")
+        return "\n".join(lines)
+
+    def dump_json(self, path, extra=None):
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+# -------------------- 时间线录制 / 回放 -------------------- #
+class Timeline:
+    """
+    二进制时间线：文件头 (magic, 版本, seed, 总时长) 之后是定长记录 (类型, 相对开始的毫秒, 值)。
+    记录的是所有随机决定（滚动间隔、name 行时刻偏移）和显示的内容索引；时刻取回调的计划时刻，
+    因此同一 seed 的两次运行写出的文件逐字节相同。
+    """
+
+    MAGIC = b"TLN1"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHqd")
+    RECORD = struct.Struct("<BII")
+    SCROLL_DELAY = 1
+    NAME_OFFSET = 2
+    ERROR_LINE = 3
+    NAME_LINE = 4
+    # 稀疏事件：只在卡顿后截止时间被整体平移时才记一条，值为平移的毫秒数
+    SCROLL_RESYNC = 5
+    NAME_RESYNC = 6
+    KIND_NAMES = {SCROLL_DELAY: "scroll_delay", NAME_OFFSET: "name_offset", ERROR_LINE: "error_line",
+                  NAME_LINE: "name_line", SCROLL_RESYNC: "scroll_resync", NAME_RESYNC: "name_resync"}
+
+
+class TimelineRecorder(Timeline):
+    def __init__(self, path, seed=None, duration=0.0):
+        self._file = open(path, "wb")
+        self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, -1 if seed is None else int(seed),
+                                          float(duration)))
+        self._buf = bytearray()
+        self.count = 0
+
+    def record(self, kind, t_ms, value):
+        self._buf += self.RECORD.pack(kind, max(0, t_ms), value)
+        self.count += 1
+        if len(self._buf) >= 1 << 16:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            self._file.write(self._buf)
+            self._buf.clear()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class TimelinePlayer(Timeline):
+    """按类型依次取出录制的值；记录用完后回退到调用方给的值，时刻对不上时计入 diverged"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, self.duration = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"not a timeline file: {path}")
+        self.seed = None if seed < 0 else seed
+        self._queues = {kind: deque() for kind in self.KIND_NAMES}
+        body = memoryview(data)[self.HEADER.size:]
+        usable = len(body) - len(body) % self.RECORD.size
+        for kind, t_ms, value in self.RECORD.iter_unpack(body[:usable]):
+            self._queues.setdefault(kind, deque()).append((t_ms, value))
+        self.count = usable // self.RECORD.size
+        self.exhausted = 0
+        self.diverged = 0
+
+    def take(self, kind, t_ms, fallback):
+        queue = self._queues.get(kind)
+        if not queue:
+            self.exhausted += 1
+            return fallback
+        recorded_ms, value = queue.popleft()
+        if recorded_ms != t_ms:
+            self.diverged += 1
+        return value
+
+    def take_if(self, kind, t_ms, fallback):
+        """稀疏事件：下一条记录正好录在 t_ms 时取出它的值，否则返回 fallback；已经错过的记录丢弃并计入 diverged"""
+        queue = self._queues.get(kind)
+        while queue and queue[0][0] < t_ms:
+            queue.popleft()
+            self.diverged += 1
+        if queue and queue[0][0] == t_ms:
+            return queue.popleft()[1]
+        return fallback
+
+    def remaining(self):
+        return sum(len(q) for q in self._queues.values())
+
+
+# -------------------- 保留模式场景层（只发送真正的变化） -------------------- #
+class RetainedCanvas:
+    """
+    tk.Canvas 的薄封装：记住每个画布项最后一次发出的属性、坐标和叠放顺序。
+    itemconfig / coords 先记下，flush() 时与已发送的值比较，只把变化发给 Tk；
+    set_top_order 给出需要压在最上面的项（自下而上），flush 时只 raise 顺序不对的那部分。
+    flush 由 after_idle 合并到每帧一次。
+    """
+
+    def __init__(self, canvas, root=None):
+        self.canvas = canvas
+        self.root = root
+        self._sent = {}
+        self._pending = {}
+        self._order = ()
+        self._stack = []       # 已知的叠放顺序（自下而上，只含经本层创建的项）
+        self._created = []     # 上次 flush 之后新建的项
+        self._deleted = set()
+        self._flush_pending = False
+        self.commands = 0      # 实际发出的 Tcl 命令数
+        self.suppressed = 0    # 因值未变化而省掉的命令数
+
+    def create(self, kind, *coords, **options):
+        item = getattr(self.canvas, "create_" + kind)(*coords, **options)
+        self.commands += 1
+        # 不记 image：图片的引用由调用方（ImageRefTable）管理，行项复用时也直接换图，这里记着只会拖住旧图
+        self._sent[item] = {k: v for k, v in options.items() if k != "image"}
+        self._sent[item]["coords"] = tuple(coords)
+        self._stack.append(item)
+        self._created.append(item)
+        return item
+
+    def delete(self, item):
+        self.canvas.delete(item)
+        self.commands += 1
+        self._sent.pop(item, None)
+        self._pending.pop(item, None)
+        self._deleted.add(item)
+
+    def itemconfig(self, item, **options):
+        for key, value in options.items():
+            self._set(item, key, value)
+
+    def coords(self, item, *coords):
+        self._set(item, "coords", tuple(coords))
+
+    def _set(self, item, key, value):
+        pending = self._pending.get(item)
+        if (pending is None or key not in pending) and self._sent.get(item, {}).get(key) == value:
+            self.suppressed += 1
+            return
+        self._pending.setdefault(item, {})[key] = value
+        self.request_flush()
+
+    def set_top_order(self, items):
+        items = tuple(i for i in items if i)
+        if items != self._order:
+            self._order = items
+            self.request_flush()
+
+    def request_flush(self):
+        if not self._flush_pending and self.root is not None:
+            self._flush_pending = True
+            self.root.after_idle(self.flush)
+
+    def flush(self):
+        self._flush_pending = False
+        for item, pending in self._pending.items():
+            sent = self._sent.setdefault(item, {})
+            coords = pending.pop("coords", None)
+            if coords is not None and sent.get("coords") != coords:
+                self.canvas.coords(item, *coords)
+                sent["coords"] = coords
+                self.commands += 1
+            changed = {k: v for k, v in pending.items() if sent.get(k) != v}
+            if changed:
+                self.canvas.itemconfig(item, **changed)
+                sent.update(changed)
+                self.commands += 1
+        self._pending.clear()
+        self._restack()
+
+    def _restack(self):
+        if not self._created and not self._deleted and self._stack[len(self._stack) - len(self._order):] == list(self._order):
+            return
+        order = self._order
+        wanted = set(order)
+        actual = [i for i in self._stack if i not in self._deleted]
+        # 新建了不在顺序表里的项（它压在最上面）时全部重新 raise；
+        # 否则原地不动的是 order 中能按顺序在 actual 里找到的最长前缀
+        keep = 0
+        if all(i in wanted for i in self._created):
+            for item in actual:
+                if keep < len(order) and item == order[keep]:
+                    keep += 1
+        for item in order[keep:]:
+            self.canvas.tag_raise(item)
+            self.commands += 1
+        self._stack = [i for i in actual if i not in wanted] + list(order)
+        self._created = []
+        self._deleted.clear()
+
+
+# -------------------- 整帧合成器（不依赖 Tk） -------------------- #
+def _draw_anchored_text(draw, xy, text, font, fill, anchor):
+    # 位图默认字体不支持 anchor，退回左上角定位
+    try:
+        draw.text(xy, text, font=font, fill=fill, anchor=anchor)
+    except Exception:
+        draw.text(xy, text, font=font, fill=fill)
+
+
+class FrameCompositor:
+    """
+    静态背景 + 按固定顺序叠放的若干图层，合成到一块 RGBA 帧缓冲。
+    图层变化时只记录脏矩形，compose() 只重画这些区域。
+    """
+
+    def __init__(self, width, height, background, layers=()):
+        self.width = int(width)
+        self.height = int(height)
+        self.background = background
+        self.frame = background.copy()
+        self._order = list(layers)
+        self._layers = {}
+        self._dirty = []
+
+    def set_layer(self, name, image, pos=(0, 0), dirty=None, origin=0):
+        """
+        替换图层（image 为 None 表示移除）；dirty 为 None 时新旧包围盒都记为脏。
+        origin 把 image 当作纵向环形缓冲：图层第 0 行取自 image 的第 origin 行，到底后绕回第 0 行。
+        """
+        old = self._layers.get(name)
+        if name not in self._order:
+            self._order.append(name)
+        if image is None:
+            self._layers.pop(name, None)
+        else:
+            self._layers[name] = (image, (int(pos[0]), int(pos[1])), int(origin) % image.height)
+        if dirty is not None:
+            self.mark_dirty(dirty)
+            return
+        if old is not None:
+            self.mark_dirty(self._layer_box(*old))
+        if image is not None:
+            self.mark_dirty(self._layer_box(*self._layers[name]))
+
+    def mark_dirty(self, box):
+        x1 = max(0, int(box[0])); y1 = max(0, int(box[1]))
+        x2 = min(self.width, int(box[2] + 0.999)); y2 = min(self.height, int(box[3] + 0.999))
+        if x1 < x2 and y1 < y2:
+            self._dirty.append((x1, y1, x2, y2))
+
+    def invalidate(self):
+        self._dirty = [(0, 0, self.width, self.height)]
+
+    def compose(self):
+        """重画所有脏区域，返回本次重画的矩形列表（为空表示帧没有变化）"""
+        if not self._dirty:
+            return []
+        boxes = self._merge(self._dirty)
+        self._dirty = []
+        for box in boxes:
+            self.frame.paste(self.background.crop(box), box[:2])
+            for name in self._order:
+                layer = self._layers.get(name)
+                if layer is not None:
+                    self._paint(box, *layer)
+        return boxes
+
+    @staticmethod
+    def _layer_box(image, pos, origin=0):
+        return (pos[0], pos[1], pos[0] + image.width, pos[1] + image.height)
+
+    @staticmethod
+    def _merge(boxes):
+        # 相交的脏矩形合并成包围盒，避免同一区域重复重画
+        merged = []
+        for box in boxes:
+            x1, y1, x2, y2 = box
+            i = 0
+            while i < len(merged):
+                m = merged[i]
+                if x1 <= m[2] and m[0] <= x2 and y1 <= m[3] and m[1] <= y2:
+                    x1 = min(x1, m[0]); y1 = min(y1, m[1]); x2 = max(x2, m[2]); y2 = max(y2, m[3])
+                    merged.pop(i)
+                    i = 0
+                    continue
+                i += 1
+            merged.append((x1, y1, x2, y2))
+        return merged
+
+    def _paint(self, box, image, pos, origin=0):
+        lx, ly = pos
+        x1 = max(box[0], lx); y1 = max(box[1], ly)
+        x2 = min(box[2], lx + image.width); y2 = min(box[3], ly + image.height)
+        if x1 >= x2 or y1 >= y2:
+            return
+        # 环形图层拆成两段：图层行 [0, h - origin) 取自 image 的 [origin, h)，其余取自 [0, origin)
+        wrap = ly + image.height - origin
+        for top, bottom, shift in ((y1, min(y2, wrap), origin), (max(y1, wrap), y2, origin - image.height)):
+            if top < bottom:
+                self.frame.alpha_composite(image, dest=(x1, top),
+                                           source=(x1 - lx, top - ly + shift, x2 - lx, bottom - ly + shift))
+
+
+# -------------------- 显示器探测 -------------------- #
+def _detect_monitors():
+    """
+    返回每个显示器的 (x, y, 宽, 高)，主显示器在前；探测不到时返回空列表。
+    依次尝试可选的 screeninfo、Windows 的 EnumDisplayMonitors、X11 的 xrandr。
+    """
+    try:
+        from screeninfo import get_monitors
+        monitors = sorted(get_monitors(), key=lambda m: not getattr(m, "is_primary", False))
+        return [(m.x, m.y, m.width, m.height) for m in monitors]
+    except Exception:
+        pass
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+            rects = []
+            proc = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC,
+                                      ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+
+            def collect(hmon, hdc, rect, data):
+                r = rect.contents
+                rects.append((r.left, r.top, r.right - r.left, r.bottom - r.top))
+                return 1
+            ctypes.windll.user32.EnumDisplayMonitors(None, None, proc(collect), 0)
+            # 主显示器的左上角是 (0, 0)
+            return sorted(rects, key=lambda r: (r[0], r[1]) != (0, 0))
+        except Exception:
+            return []
+    try:
+        import subprocess
+        out = subprocess.run(["xrandr", "--listmonitors"], capture_output=True, text=True, timeout=2).stdout
+    except Exception:
+        return []
+    monitors = []
+    for line in out.splitlines()[1:]:
+        # " 0: +*DP-1 2560/597x1440/336+0+0  DP-1"
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        try:
+            size, x, y = parts[2].split("+")
+            w, h = size.split("x")
+            monitors.append(("*" in parts[1], (int(x), int(y), int(w.split("/")[0]), int(h.split("/")[0]))))
+        except ValueError:
+            continue
+    return [geometry for primary, geometry in sorted(monitors, key=lambda m: not m[0])]
+
+
+class FixedTransparentErrorSimulator:
+    def __init__(self, total_duration_seconds=300, progress_update_interval_ms=100, raster_cache_size=512,
+                 progress_easing="linear", progress_stalls=(), seed=None, instrument=False, instrument_json=None,
+                 persist_line_index=False, hot_reload=False, name_prefetch=6, raster_workers=2,
+                 raster_atlas_dir=None, raster_atlas_mb=64, glyph_atlas=False, record_path=None, replay_path=None,
+                 time_scale=1.0, screen=None, shared=None, smooth_scroll=None, frame_rate=60,
+                 startup_trace=False, font_index=None, scenario=None, glitch=False, glitch_budget_ms=4.0,
+                 glitch_variants=4):
+        # 分阶段启动：窗口与静态边框先出现，然后才导入 Pillow、加载字体与文本
+        self.startup = StartupTrace()
+        self.startup_trace = startup_trace
+        self.startup.mark("import")
+        # 回放加速：实时时钟乘以 time_scale，所有定时与进度同比例变快
+        self.time_scale = float(time_scale)
+        self._virtual_now = None  # 不限速回放时的逻辑时钟
+        # 多显示器：screen 为该窗口的 (x, y, 宽, 高)；shared 为主屏实例，其余屏与它共用缓存、调度器和时钟
+        self.screen = screen
+        self.shared = shared
+        self.peers = []
+        # 窗口与画布
+        self._create_window()
+        self.startup.mark("window")
+        # 画布引擎的静态 UI 通过保留模式场景层更新，只发送变化
+        self.scene = RetainedCanvas(self.canvas, self.root) if self.canvas is not None else None
+
+        # 时间线：回放时所有随机决定与内容索引取自文件，录制时写入文件
+        self.replay = TimelinePlayer(replay_path) if replay_path and shared is None else None
+        if self.replay is not None and seed is None:
+            seed = self.replay.seed
+        self.recorder = TimelineRecorder(record_path, seed=seed, duration=total_duration_seconds) \
+            if record_path and shared is None else None
+
+        # 随机源：给定 seed 时整段动画可复现
+        self.rng = random.Random(seed)
 
         # 主边框与内框几何（保持原始风格）
         self.border_x1 = int(self.screen_width * 0.1)
@@ -37,21 +2295,6 @@ class FixedTransparentErrorSimulator:
         self.inner_top = self.border_y1 + 7
         self.inner_bottom = int(self.border_y1 + (self.border_y2 - self.border_y1) * 0.18)
 
-        # 进度条参考位置（保持原视觉）
-        small_rect_height = (self.border_y2 - self.border_y1) * 0.08
-        center_x = (self.inner_left + self.inner_right) / 2
-        small_top = self.inner_bottom + (self.border_y2 - self.border_y1) * 0.10
-        small_bottom = small_top + small_rect_height
-        new_rect_top = small_bottom + (self.border_y2 - self.border_y1) * 0.15
-        new_rect_height = (self.border_y2 - self.border_y1) * 0.13
-        new_rect_width = (self.inner_right - self.inner_left) * 0.97
-        new_rect_left = center_x - new_rect_width / 2
-        new_rect_right = center_x + new_rect_width / 2
-        new_rect_bottom = new_rect_top + new_rect_height
-        if new_rect_bottom > self.border_y2:
-            new_rect_bottom = self.border_y2 - 5
-        self._progress_rect = (new_rect_left + 2, new_rect_top + 2, new_rect_right - 2, new_rect_bottom - 2)
-
         # 错误文本区域：整个屏幕左侧（红框外），垂直覆盖整个屏幕（从最顶到最底）
         self.text_area_left = 10
         self.text_area_right = max(self.text_area_left + 50, self.inner_left - 10)
@@ -60,122 +2303,304 @@ class FixedTransparentErrorSimulator:
         self.text_area_bottom = self.screen_height
 
         # 文本滚动容器：每行一张图片（保留空行）
-        self.text_items = []  # 存储 (canvas_id, y_pos, img_ref, height)
+        # 每行 (canvas_id, y_pos, img_ref, height)，y_pos 为内容坐标，屏幕坐标 = y_pos - scroll_offset
+        self.text_items = LineRing()
+        self._free_line_ids = []  # 滚出屏幕、等待复用的画布项
+        self.scroll_offset = 0
         self.current_y = self.text_area_top
         self.screen_filled = False
-
-        # 读取文件
-        self.error_lines = self.load_error_lines()
-        self.current_line_index = 0
-        self.name_lines = self.load_name_lines()
+        # 平滑滚动：给定像素/秒时按 frame_rate 逐帧连续上移，否则保持整行跳动
+        self.smooth_scroll = float(smooth_scroll) if smooth_scroll else None
+        self.frame_rate = float(frame_rate)
+        self.scroll_stats = None
 
         # 进度条
         self.total_duration_seconds = float(total_duration_seconds)
+        # 进度不再轮询，按 progress_clock 在每次百分比变化时唤醒；该参数仅保留兼容
         self.progress_update_interval_ms = int(progress_update_interval_ms)
+        self.progress_clock = ProgressClock(self.total_duration_seconds, easing=progress_easing,
+                                            stalls=progress_stalls)
+        # 场景文件：启动前编译成扁平事件数组，运行时顺着游标执行；进度查询也改由编译结果回答
+        self.scenario = None
+        if scenario is not None:
+            if not isinstance(scenario, Scenario):
+                scenario = Scenario.load(scenario)
+            self.scenario = scenario.compile(seed)
+            self.progress_clock = self.scenario
+        self.error_color = (254, 25, 38, 255)
+        self.percent_color = (255, 255, 255, 255)
         self.progress_text_id = None
         self.progress_percent = 0
         self.start_time = None
         self.last_percent_update = 0
         self.bar_bg_id = None
         self.bar_fill_id = None
-        self.bar_slash_ids = []
+        self.bar_hatch_id = None
+        self.bar_cover_id = None
+        self._hatch_textures = shared._hatch_textures if shared is not None else {}  # 几何 -> 斜线纹理
 
         # name.txt 显示
         self.current_name_text_id = None
-        self._name_after_ids = []
+        self._name_timers = []  # 当前这一秒的 3 个显示 + 下一批调度，最多 4 个句柄
+
+        # 所有动画定时统一由 scheduler 驱动；多屏时共用主屏的调度器与时钟，进度同步
+        if shared is not None:
+            self.scheduler = shared.scheduler
+        else:
+            self.scheduler = DeadlineScheduler(self.root, clock=self._now, time_scale=self.time_scale)
+
+        # 定时插桩：F3 切换屏幕统计，退出时可写出 JSON
+        self.instrument_json = instrument_json if shared is None else None
+        if shared is not None:
+            self.probe = shared.probe
+        else:
+            self.probe = TimerProbe() if (instrument or instrument_json) else None
+            self.scheduler.probe = self.probe
+        self.hud_visible = False
+        self._hud_item_id = None
+        self._hud_timer = None
 
-        # PIL 字体
         self.default_font_size = 16
         self.name_font_size = 22
+        self.ui_family = "微软雅黑"  # Tk 文字的字体族；字体索引挑出字体后改用它
+        self.current_line_index = 0
+        self.corpus_watcher = None
+
+        # 画布引擎的边框只用 Tk 图元，先画出来并让窗口映射上屏
+        if self.EARLY_BORDER:
+            self.draw_outline_border()
+            self.startup.mark("border")
+        self._map_window()
+
+        # PIL 字体（此时才导入 Pillow）
+        _import_pillow()
+        self.startup.mark("pillow")
+        # 字体索引：按 error.txt / name.txt 实际出现的字符挑覆盖最全的系统字体（各屏共用注册表，只挑一次）
+        if font_index and shared is None:
+            FONT_REGISTRY.use_index(FontIndex(font_index, background=self.BACKGROUND_INDEX),
+                                    _corpus_charset(["error.txt", "name.txt"]))
         self.pil_font = self._load_font(size=self.default_font_size)
         self.pil_name_font = self._load_font(size=self.name_font_size)
+        self._apply_ui_family(FONT_REGISTRY.family())
+        self.startup.mark("fonts")
+
+        # 读取文件（按偏移读取的行源，按需解码，不整体读入）
+        self.persist_line_index = persist_line_index
+        if shared is not None:
+            # 行源只打开一次；热更新由主屏换入后同步过来
+            self.error_lines = shared.error_lines
+            self.name_lines = shared.name_lines
+        else:
+            self.error_lines = self.load_error_lines()
+            self.name_lines = self.load_name_lines()
+        if hot_reload and shared is None:
+            self.corpus_watcher = CorpusWatcher(["error.txt", "name.txt"], persist_index=persist_line_index)
+            self.corpus_watcher.track("error.txt", self.error_lines)
+            self.corpus_watcher.track("name.txt", self.name_lines)
+        self.startup.mark("corpora")
 
         # 保持 PhotoImage 引用，防止 GC
-        self._image_refs = []
+        self._image_refs = ImageRefTable()
+        # 已渲染行图缓存：同一行再次出现时直接复用 PhotoImage（同一个 Tk 解释器里各屏通用）
+        self.raster_cache = shared.raster_cache if shared is not None else LineRasterCache(raster_cache_size)
+        # name 行提前在线程池里渲染；工作线程各自持有字体对象，不与 Tk 线程共享 FreeType face
+        shared_pool = shared.name_prefetcher._pool if shared is not None and shared.name_prefetcher else None
+        self.name_prefetcher = RasterPrefetcher(self._render_name_in_worker, depth=name_prefetch,
+                                                workers=raster_workers, pool=shared_pool) \
+            if name_prefetch > 0 else None
+        self._prefetch_next = 0
+        self._worker_local = shared._worker_local if shared is not None else threading.local()
+        # 字形图集：逐字形缓存后用 NumPy 拼行，适合几乎每行都不同的 name.txt
+        self.glyph_atlas = bool(glyph_atlas) and np is not None
+        self._glyph_atlases = shared._glyph_atlases if shared is not None else {}
+        self._glyph_lock = shared._glyph_lock if shared is not None else threading.Lock()
+        # 错误行故障效果：变体按行缓存，各屏共用
+        if shared is not None:
+            self.glitch = shared.glitch
+        else:
+            self.glitch = GlitchEffects(glitch_variants, budget_ms=glitch_budget_ms, frame_seconds=1.0 / self.frame_rate,
+                                        capacity=raster_cache_size // 2, seed=seed) \
+                if glitch and np is not None else None
+        # 磁盘行图集：上次运行渲染过的行直接从文件切出
+        if shared is not None:
+            self.raster_atlas = shared.raster_atlas
+        else:
+            self.raster_atlas = RasterAtlas(raster_atlas_dir, max_bytes=raster_atlas_mb << 20) \
+                if raster_atlas_dir else None
+            self._update_atlas_sources()
+
+        # 合成引擎的边框本身就是 Pillow 图片，放在字体之后
+        if not self.EARLY_BORDER:
+            self.draw_outline_border()
+            self.startup.mark("border")
+
+    # 画布引擎可以在导入 Pillow 之前画出静态边框
+    EARLY_BORDER = True
+    # 大文本文件的行索引、系统字体索引都在后台线程里建，首帧不等它们扫完
+    BACKGROUND_INDEX = True
+
+    def _map_window(self):
+        """立刻处理挂起的绘制，让窗口在后续较慢的初始化之前就显示出来"""
+        if self.root is not None:
+            self.root.update()
+            self.startup.mark("first_frame")
+
+    def _create_window(self):
+        # 其余显示器的窗口是主屏根窗口的 Toplevel，共用同一个 Tcl 解释器（PhotoImage 可以互相复用）
+        self.root = tk.Toplevel(self.shared.root) if self.shared is not None else tk.Tk()
+        if self.screen is None:
+            self.root.attributes('-fullscreen', True)
+        else:
+            x, y, w, h = self.screen
+            self.root.geometry(f"{w}x{h}+{x}+{y}")
+        self.root.attributes('-topmost', True)
+        try:
+            self.root.attributes('-transparentcolor', 'black')
+            self.root.configure(bg='black')
+        except Exception:
+            self.root.configure(bg='black')
+        self.root.overrideredirect(True)
+
+        if self.screen is None:
+            self.screen_width = self.root.winfo_screenwidth()
+            self.screen_height = self.root.winfo_screenheight()
+        else:
+            self.screen_width, self.screen_height = self.screen[2], self.screen[3]
+
+        self.canvas = tk.Canvas(self.root, bg='black', highlightthickness=0,
+                                width=self.screen_width, height=self.screen_height)
+        self.canvas.pack()
 
         # 绑定按键退出
-        self.root.bind('<Escape>', lambda e: self.root.destroy())
+        self.root.bind('<Escape>', lambda e: self.shutdown())
         self.root.bind('<KeyPress>', self.on_key_press)
 
-        # 绘制边框/进度条等 UI
-        self.draw_outline_border()
+    def _now(self):
+        if self._virtual_now is not None:
+            return self._virtual_now
+        return time.monotonic() * self.time_scale
 
     # -------------------- 字体 / 文件 -------------------- #
     def _load_font(self, size=16):
-        candidates = []
-        if sys.platform.startswith("win"):
-            candidates = [
-                r"C:\Windows\Fonts\msyh.ttc",
-                r"C:\Windows\Fonts\msyhbd.ttf",
-                r"C:\Windows\Fonts\simhei.ttf",
-                r"C:\Windows\Fonts\segoeui.ttf",
-            ]
-        elif sys.platform.startswith("darwin"):
-            candidates = [
-                "/System/Library/Fonts/STHeiti Medium.ttc",
-                "/Library/Fonts/Arial.ttf",
-            ]
-        else:
-            candidates = [
-                "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            ]
-        for path in candidates:
-            try:
-                if os.path.exists(path):
-                    return ImageFont.truetype(path, size)
-            except Exception:
-                pass
-        try:
-            return ImageFont.load_default()
-        except Exception:
+        return FONT_REGISTRY.load(size)
+
+    def _open_line_source(self, path):
+        """大文件按需解码；文件不存在或为空时返回 None"""
+        if not os.path.exists(path):
             return None
+        source = LineSource(path, persist_index=self.persist_line_index, background=self.BACKGROUND_INDEX)
+        if not source.size:
+            source.close()
+            return None
+        return source
 
     def load_error_lines(self):
         try:
+            source = self._open_line_source("error.txt")
+            if source is not None:
+                # 保留空行、不要 trim
+                return source
             if os.path.exists("error.txt"):
-                with open("error.txt", "r", encoding="utf-8") as f:
-                    # 保留空行、不要 trim
-                    lines = [line.rstrip('\n\r') for line in f.readlines()]
-                    return lines or ["(no errors)"]
-            else:
-                # 示例行便于测试
-                return [
-                    "ERROR: error.txt not found",
-                    "Simulated error line 2 - long sample to test.",
-                    "",
-                    "Next error: Disk read failed at sector 31244",
-                ]
+                return ["(no errors)"]
+            # 示例行便于测试
+            return [
+                "ERROR: error.txt not found",
+                "Simulated error line 2 - long sample to test.",
+                "",
+                "Next error: Disk read failed at sector 31244",
+            ]
         except Exception as e:
             return [f"ERROR reading file: {e}"]
 
     def load_name_lines(self):
         try:
-            if os.path.exists("name.txt"):
-                with open("name.txt", "r", encoding="utf-8") as f:
-                    return [l.rstrip('\n\r') for l in f.readlines()] or []
-            else:
-                return []
+            # 不用 `or []`：后台还在建索引时 len() 可能暂时为 0
+            source = self._open_line_source("name.txt")
+            return source if source is not None else []
         except Exception:
             return []
 
     def get_next_line(self):
-        if not self.error_lines:
+        lines = self.error_lines  # 热更新可能随时换入新的行源，这里只取一次
+        if not lines:
             return ""
-        line = self.error_lines[self.current_line_index]
-        self.current_line_index = (self.current_line_index + 1) % len(self.error_lines)
-        return line
+        index = self._timeline(Timeline.ERROR_LINE, self.current_line_index % len(lines)) % len(lines)
+        self.current_line_index = (index + 1) % len(lines)
+        return lines[index]
+
+    # -------------------- 时间线 -------------------- #
+    def _timeline_ms(self, at=None):
+        if at is None:
+            at = self.scheduler.current_deadline
+            if at is None:
+                at = self.scheduler.clock()
+        return int(round((at - (self.start_time or 0.0)) * 1000))
+
+    def _timeline(self, kind, value, at=None):
+        """录制/回放的统一入口：回放时返回时间线里的值，否则原样返回；录制时记下最终使用的值"""
+        if self.replay is None and self.recorder is None:
+            return value
+        t_ms = self._timeline_ms(at)
+        if self.replay is not None:
+            value = self.replay.take(kind, t_ms, value)
+        if self.recorder is not None:
+            self.recorder.record(kind, t_ms, value)
+        return value
+
+    # 截止时间落后超过这么多秒就不再逐个补发
+    CATCH_UP_SLACK = 0.5
+
+    def _resync(self, kind, base):
+        """
+        滚动和 name 批次的截止时间按绝对时刻累加；卡顿或挂起恢复后它们会一次性全部到期。
+        落后超过 CATCH_UP_SLACK 时把 base 平移到 clock() - CATCH_UP_SLACK，只补最后一小段。
+        平移量写进时间线，回放时按录制的量平移而不看实时时钟，同一录制回放出的事件序列不变。
+        """
+        t_ms = self._timeline_ms(base)
+        if self.replay is not None:
+            skip_ms = self.replay.take_if(kind, t_ms, 0)
+        else:
+            behind = self.scheduler.clock() - self.CATCH_UP_SLACK - base
+            skip_ms = int(behind * 1000) if behind > 0 else 0
+        if skip_ms and self.recorder is not None:
+            self.recorder.record(kind, t_ms, skip_ms)
+        return base + skip_ms / 1000.0
+
+    def _apply_reloads(self):
+        """在 UI 线程换入监视线程准备好的新行源，索引位置保持不变"""
+        watcher = self.corpus_watcher
+        while watcher.ready:
+            path, source = watcher.ready.popleft()
+            if path == "error.txt":
+                old = self.error_lines
+                for sim in (self, *self.peers):
+                    sim.error_lines = source if len(source) else ["(no errors)"]
+            else:
+                old = self.name_lines
+                was_empty = not old
+                for sim in (self, *self.peers):
+                    sim.name_lines = source if len(source) else []
+                    if sim.name_prefetcher is not None:
+                        # 队列里是旧文件的行，下一次显示时从新文件的当前位置重新预取
+                        sim.name_prefetcher.clear()
+                    if was_empty and sim.name_lines and sim.start_time is not None and sim.scenario is None:
+                        # 之前没有文件名可显示，调度已经停止，这里重新开始
+                        sim._next_triplet_at = self.scheduler.clock()
+                        sim._schedule_next_triplet()
+            if isinstance(old, LineSource) and old is not source:
+                old.close()
+            if not len(source):
+                # 空文件换成了占位列表，行源本身不再使用；监视线程只用它的索引与 digest 判断下次是否追加
+                source.close()
+            self._update_atlas_sources()
+        self.scheduler.call_later(watcher.interval * 1000, self._apply_reloads, name="reload")
 
     # -------------------- 绘制边框 / 进度条 -------------------- #
-    def draw_outline_border(self):
+    def _border_layout(self):
+        """边框/百分比框/标题/进度条外框的几何，画布引擎与合成引擎共用"""
         x1 = self.border_x1; y1 = self.border_y1; x2 = self.border_x2; y2 = self.border_y2
-        self.canvas.create_rectangle(x1, y1, x2, y2, outline="#fe4f4e", width=4, fill="")
-
         inner_left = self.inner_left; inner_right = self.inner_right
         inner_top = self.inner_top; inner_bottom = self.inner_bottom
-        self.canvas.create_rectangle(inner_left, inner_top, inner_right, inner_bottom,
-                                     fill="#fe4f4e", outline="")
 
         small_rect_height = (y2 - y1) * 0.08
         small_rect_width = (inner_right - inner_left) * 0.15
@@ -184,30 +2609,10 @@ class FixedTransparentErrorSimulator:
         small_bottom = small_top + small_rect_height
         small_left = center_x - small_rect_width / 2
         small_right = center_x + small_rect_width / 2
-        self.canvas.create_rectangle(small_left, small_top, small_right, small_bottom,
-                                     fill="#450e0f", outline="")
-
-        self.progress_text_id = self.canvas.create_text(
-            center_x, (small_top + small_bottom)/2, text="0%", fill="white",
-            font=("微软雅黑", 28, "bold"), anchor="center")
 
         rect_center_x = (inner_left + inner_right) / 2
         rect_center_y = (inner_top + inner_bottom) / 2
         triangle_size = 20
-        self.warning_triangle_id = self.canvas.create_polygon(
-            rect_center_x - 60, rect_center_y - triangle_size,
-            rect_center_x - 60 - triangle_size, rect_center_y + triangle_size,
-            rect_center_x - 60 + triangle_size, rect_center_y + triangle_size,
-            fill="white", outline="white"
-        )
-        self.warning_exclamation_id = self.canvas.create_text(
-            rect_center_x - 60, rect_center_y, text="!", fill="#fe4f4e",
-            font=("Arial", 18, "bold")
-        )
-        self.title_text_id = self.canvas.create_text(
-            rect_center_x - 15, rect_center_y, text="数据删除进度",
-            fill="white", font=("微软雅黑", 14, "bold"), anchor="w"
-        )
 
         new_rect_top = small_bottom + (y2 - y1) * 0.15
         new_rect_height = (y2 - y1) * 0.13
@@ -218,28 +2623,90 @@ class FixedTransparentErrorSimulator:
         if new_rect_bottom > y2:
             new_rect_bottom = y2 - 5
 
-        self.draw_progress_bar(new_rect_left + 2, new_rect_top + 2, new_rect_right - 2, new_rect_bottom - 2)
-        self.canvas.create_rectangle(new_rect_left, new_rect_top, new_rect_right, new_rect_bottom,
-                                     outline="white", width=3, fill="")
+        return {
+            "border": (x1, y1, x2, y2),
+            "inner": (inner_left, inner_top, inner_right, inner_bottom),
+            "percent_box": (small_left, small_top, small_right, small_bottom),
+            "percent_center": (center_x, (small_top + small_bottom) / 2),
+            "triangle": (
+                rect_center_x - 60, rect_center_y - triangle_size,
+                rect_center_x - 60 - triangle_size, rect_center_y + triangle_size,
+                rect_center_x - 60 + triangle_size, rect_center_y + triangle_size,
+            ),
+            "exclamation": (rect_center_x - 60, rect_center_y),
+            "title": (rect_center_x - 15, rect_center_y),
+            "bar_frame": (new_rect_left, new_rect_top, new_rect_right, new_rect_bottom),
+        }
 
-    def draw_progress_bar(self, left, top, right, bottom):
+    def draw_outline_border(self):
+        layout = self._border_layout()
+        scene = self.scene
+        scene.create("rectangle", *layout["border"], outline="#fe4f4e", width=4, fill="")
+        scene.create("rectangle", *layout["inner"], fill="#fe4f4e", outline="")
+        scene.create("rectangle", *layout["percent_box"], fill="#450e0f", outline="")
+
+        self.progress_text_id = scene.create(
+            "text", *layout["percent_center"], text="0%", fill="white",
+            font=(self.ui_family, 28, "bold"), anchor="center")
+
+        self.warning_triangle_id = scene.create(
+            "polygon", *layout["triangle"], fill="white", outline="white"
+        )
+        self.warning_exclamation_id = scene.create(
+            "text", *layout["exclamation"], text="!", fill="#fe4f4e",
+            font=("Arial", 18, "bold")
+        )
+        self.title_text_id = scene.create(
+            "text", *layout["title"], text="数据删除进度",
+            fill="white", font=(self.ui_family, 14, "bold"), anchor="w"
+        )
+
+        left, top, right, bottom = layout["bar_frame"]
+        self.draw_progress_bar(left + 2, top + 2, right - 2, bottom - 2)
+        scene.create("rectangle", left, top, right, bottom, outline="white", width=3, fill="")
+
+    def _apply_ui_family(self, family):
+        """边框先于字体画出；字体挑好后把已有的 Tk 文字改用同一字体族"""
+        if not family or family == self.ui_family:
+            return
+        self.ui_family = family
+        for item, size in ((self.progress_text_id, 28), (getattr(self, "title_text_id", None), 14)):
+            if item is not None and self.scene is not None:
+                self.scene.itemconfig(item, font=(family, size, "bold"))
+
+    def _set_bar_geometry(self, left, top, right, bottom):
         self.bar_left = left + 5
         self.bar_top = top + 5
         self.bar_right = right - 5
         self.bar_bottom = bottom - 5
         self.bar_width = max(1, self.bar_right - self.bar_left)
         self.bar_height = max(1, self.bar_bottom - self.bar_top)
+
+    def draw_progress_bar(self, left, top, right, bottom):
+        self._set_bar_geometry(left, top, right, bottom)
         try:
-            self.bar_bg_id = self.canvas.create_rectangle(self.bar_left, self.bar_top, self.bar_right, self.bar_bottom,
-                                                          fill="", outline="")
+            self.bar_bg_id = self.scene.create("rectangle", self.bar_left, self.bar_top, self.bar_right,
+                                               self.bar_bottom, fill="", outline="")
         except Exception:
             self.bar_bg_id = None
         try:
-            self.bar_fill_id = self.canvas.create_rectangle(self.bar_left, self.bar_top, self.bar_left, self.bar_bottom,
-                                                            fill="", outline="")
+            self.bar_fill_id = self.scene.create("rectangle", self.bar_left, self.bar_top, self.bar_left,
+                                                 self.bar_bottom, fill="", outline="")
         except Exception:
             self.bar_fill_id = None
-        self.bar_slash_ids = []
+
+    def _ensure_hatch_item(self):
+        """
+        斜线纹理只在几何确定时生成一次，进度用一块黑色（透明色）遮罩从右往左揭开。
+        纹理需要 Pillow，因此在第一次更新进度时才创建，不拖慢边框上屏。
+        """
+        if self.bar_hatch_id is not None:
+            return
+        texture, (ox, oy) = self._hatch_texture()
+        self._hatch_photo = self._make_photo(texture)
+        self.bar_hatch_id = self.scene.create("image", ox, oy, image=self._hatch_photo, anchor='nw')
+        self.bar_cover_id = self.scene.create("rectangle", ox, oy, ox + texture.width, oy + texture.height,
+                                              fill="black", outline="")
 
     # -------------------- 文本测量与渲染（不换行，保留空行） -------------------- #
     def _measure_text(self, draw_obj, text, font):
@@ -254,22 +2721,81 @@ class FixedTransparentErrorSimulator:
                 est_h = max(1, getattr(font, "size", 12))
                 return est_w, est_h
 
-    def draw_smooth_text_image(self, text, font=None, font_size=None, color=(255,255,255,255)):
+    @staticmethod
+    def _raster_key(text, font, font_size, color):
+        return (text, getattr(font, "path", None) or id(font), font_size, tuple(color))
+
+    def draw_smooth_text_image(self, text, font=None, font_size=None, color=(255,255,255,255), raster=None,
+                               variant=None):
         """
         将一整行（包括空字符串）渲染为一张图片（不换行）。
         空行会得到高度与字体高度相当的透明图片，保证显示占位。
         返回 (PhotoImage, (w,h))
+        相同 (text, font, size, color) 的结果来自 raster_cache，不再重复走 Pillow；
+        raster 为预先渲染好的 PIL 图片时直接转换，不在当前线程渲染。
+        variant 为故障变体标记时 raster 就是该变体，单独缓存，不写入磁盘图集。
         """
         if font is None:
             font = self.pil_font
-        if font_size is not None:
+        cache_key = self._raster_key(text, font, font_size, color)
+        if variant is not None:
+            cache_key += ("glitch",) + variant
+        cached = self.raster_cache.get(cache_key)
+        if cached is not None:
+            tk_img, size = cached
+            self._image_refs.hold(tk_img)
+            return tk_img, size
+
+        img = raster if variant is not None else self._rasterize(text, font, font_size, color, raster)
+        tk_img = self._make_photo(img)
+        self.raster_cache.put(cache_key, (tk_img, img.size))
+        self._image_refs.hold(tk_img)
+        return tk_img, img.size
+
+    def _rasterize(self, text, font, font_size, color, raster=None):
+        """raster_cache 未命中时取图：磁盘图集 → 预渲染结果 → Pillow 渲染，新渲染的行写入图集"""
+        atlas = self.raster_atlas
+        if atlas is None:
+            return raster if raster is not None else self.render_line_raster(text, font=font, font_size=font_size,
+                                                                              color=color)
+        key = atlas.key(text, font, font_size, color)
+        img = atlas.get(key)
+        if img is None:
+            img = raster if raster is not None else self.render_line_raster(text, font=font, font_size=font_size,
+                                                                            color=color)
+            atlas.put(key, img, "name" if font is self.pil_name_font else "error")
+        return img
+
+    def _update_atlas_sources(self):
+        """图集按来源记录 文本文件 + 字体 的签名，任一变化则该来源的旧行图作废"""
+        if self.raster_atlas is None:
+            return
+        for source, path, font in (("error", "error.txt", self.pil_font), ("name", "name.txt", self.pil_name_font)):
             try:
-                if isinstance(font, ImageFont.FreeTypeFont) and hasattr(font, "path"):
-                    font = ImageFont.truetype(font.path, font_size)
-                else:
-                    font = self._load_font(font_size)
-            except Exception:
-                font = self._load_font(font_size)
+                st = os.stat(path)
+                stamp = f"{st.st_size}:{st.st_mtime_ns}"
+            except OSError:
+                stamp = "missing"
+            self.raster_atlas.set_source(source, f"{stamp}:{self.raster_atlas.register_font(font)}")
+
+    def _make_photo(self, img):
+        return ImageTk.PhotoImage(img)
+
+    def render_line_raster(self, text, font=None, font_size=None, color=(255,255,255,255)):
+        """只做 Pillow 渲染，返回 RGBA 的 PIL Image（不创建 PhotoImage，可在无窗口时使用）"""
+        if font is None:
+            font = self.pil_font
+        if font_size is not None:
+            resolved = None
+            if isinstance(font, ImageFont.FreeTypeFont) and getattr(font, "path", None):
+                resolved = FONT_REGISTRY.get(font.path, font_size, getattr(font, "index", 0))
+            font = resolved if resolved is not None else self._load_font(font_size)
+
+        if self.glyph_atlas and text:
+            atlas = self._glyph_atlas_for(font)
+            img = atlas.compose(text, color) if atlas is not None else None
+            if img is not None:
+                return img
 
         dummy = Image.new("RGBA", (10,10), (0,0,0,0))
         draw = ImageDraw.Draw(dummy)
@@ -286,21 +2812,51 @@ class FixedTransparentErrorSimulator:
         d = ImageDraw.Draw(img)
         if text:
             d.text((pad_x, pad_y), text, font=font, fill=color)
-        tk_img = ImageTk.PhotoImage(img)
-        self._image_refs.append(tk_img)
-        return tk_img, img.size
+        return img
+
+    def _glitch_line(self, text):
+        """按当前进度给错误行挑一个故障变体：返回 (变体标记, 图片)，不做效果时为 (None, None)"""
+        if self.glitch is None or not text:
+            return None, None
+        font, size, color = self.pil_font, self.default_font_size, self.error_color
+        picked = self.glitch.pick(self._raster_key(text, font, size, color), self.progress_percent,
+                                  self.scheduler.clock(), lambda: self._rasterize(text, font, size, color))
+        if picked is None:
+            return None, None
+        level, index, img = picked
+        return (level, index), img
+
+    def _glyph_atlas_for(self, font):
+        """每个 (字体文件, 字号) 一个字形图集；没有文件路径的内置字体不走图集"""
+        path = getattr(font, "path", None)
+        if not path:
+            return None
+        key = (path, font.size, getattr(font, "index", 0))
+        atlas = self._glyph_atlases.get(key)
+        if atlas is None:
+            with self._glyph_lock:
+                atlas = self._glyph_atlases.get(key)
+                if atlas is None:
+                    atlas = self._glyph_atlases[key] = GlyphAtlas(font)
+        return atlas
 
     # -------------------- 添加一行（按 file 中每一行） -------------------- #
     def add_line(self):
         new_line = self.get_next_line()  # 可能是空字符串
+        variant, raster = self._glitch_line(new_line)
         tk_img, size = self.draw_smooth_text_image(new_line, font=self.pil_font,
                                                    font_size=self.default_font_size,
-                                                   color=(254,25,38,255))
+                                                   color=self.error_color, raster=raster, variant=variant)
         x = self.text_area_left
         y = int(self.current_y)
-        img_id = self.canvas.create_image(x, y, image=tk_img, anchor='nw')
-        item = (img_id, y, tk_img, size[1])
-        self.text_items.append(item)
+        if self._free_line_ids:
+            # 复用滚出顶部的画布项：只换图、换位置
+            img_id = self._free_line_ids.pop()
+            self.canvas.itemconfig(img_id, image=tk_img)
+            self.canvas.coords(img_id, x, y)
+        else:
+            img_id = self.scene.create("image", x, y, image=tk_img, anchor='nw', tags=(ERROR_LINE_TAG,))
+        self.text_items.append(img_id, y + self.scroll_offset, tk_img, size[1])
 
         increment = size[1]
         if increment <= 0:
@@ -313,194 +2869,952 @@ class FixedTransparentErrorSimulator:
 
     # -------------------- 按最顶部项高度滚动一次（保证整行完整移动） -------------------- #
     def scroll_all_text_once(self):
+        """
+        整列只做一次 canvas.move，滚出顶部的项放回复用池，由 add_line 重新填图。
+        每次滚动的 Tcl 调用数与屏幕高度、行高无关。
+        """
         if not self.text_items:
             self.add_line()
             return
 
-        first_item = self.text_items[0]
-        step = first_item[3]
+        step = self.text_items.head()[3]
         if step <= 0:
             step = getattr(self.pil_font, "size", self.default_font_size)
 
-        new_items = []
-        for (img_id, y_pos, img_ref, height) in self.text_items:
-            new_y = y_pos - step
-            self.canvas.coords(img_id, self.text_area_left, new_y)
-            if new_y + height >= self.text_area_top:
-                new_items.append((img_id, new_y, img_ref, height))
-            else:
-                try:
-                    self.canvas.delete(img_id)
-                except Exception:
-                    pass
-                try:
-                    if img_ref in self._image_refs:
-                        self._image_refs.remove(img_ref)
-                except Exception:
-                    pass
+        self._shift_column(step)
+        self.add_line()
+
+    def _shift_column(self, step):
+        """整列上移 step 像素（一次 canvas.move），完全滚出顶部的项放回复用池"""
+        self.canvas.move(ERROR_LINE_TAG, 0, -step)
+        self.scroll_offset += step
+
+        while self.text_items:
+            img_id, y_pos, img_ref, height = self.text_items.head()
+            if y_pos - self.scroll_offset + height >= self.text_area_top:
+                break
+            self.text_items.popleft()
+            self._free_line_ids.append(img_id)
+            self._image_refs.release(img_ref)
 
-        self.text_items = new_items
         self.current_y -= step
-        self.add_line()
+        if __debug__:
+            self._check_image_budget()
 
-    def update_display(self):
+    def _check_image_budget(self):
+        """存活的 PhotoImage 不应超过 可见行 + 当前 name 行 + 行图缓存容量，否则就是有路径漏了 release"""
+        live = len(self._image_refs) + len(self.raster_cache)
+        limit = len(self.text_items) + 1 + self.raster_cache.capacity
+        assert live <= limit, f"PhotoImage leak: {live} live > {limit}"
+
+    def _scroll_tick(self):
         if not self.screen_filled:
             self.add_line()
         else:
             self.scroll_all_text_once()
-        delay = random.randint(300, 900)
-        self.root.after(delay, self.update_display)
+
+    def update_display(self):
+        self._scroll_tick()
+        delay = self._timeline(Timeline.SCROLL_DELAY, self.rng.randint(300, 900), at=self._next_scroll_at)
+        # 按上一次的计划时刻累加，不受触发抖动影响，录制的时间线才能逐字节复现
+        self._next_scroll_at = self._resync(Timeline.SCROLL_RESYNC, self._next_scroll_at) + delay / 1000.0
+        self.scheduler.call_at(self._next_scroll_at, self.update_display)
+
+    # -------------------- 平滑滚动（固定帧率 + 帧预算调节） -------------------- #
+    # 画质档位：(每隔几帧移动一次整列, 每帧最多新渲染几行)；超预算时逐档降低，宁可降画质也不丢帧
+    SMOOTH_QUALITY = ((1, 2), (1, 1), (2, 1), (3, 1))
+
+    def _start_smooth_scroll(self):
+        self.frame_period = 1.0 / self.frame_rate
+        self._frame_index = 0
+        self._scroll_origin = None  # 列填满、开始滚动的时刻
+        self._scroll_applied = 0
+        self._frame_cost_ema = 0.0
+        self._frame_late_ema = 0.0
+        self._calm_frames = 0
+        self.scroll_stats = {"frames": 0, "missed": 0, "quality": 0, "downgrades": 0}
+        self.scheduler.call_at(self.start_time, self._smooth_frame, name="smooth_frame")
+
+    def _smooth_frame(self):
+        period = self.frame_period
+        deadline = self.scheduler.current_deadline
+        if deadline is None:
+            deadline = self.scheduler.clock()
+        late = max(0.0, self.scheduler.clock() - deadline)
+        stats = self.scroll_stats
+        stats["frames"] += 1
+        if late >= period:
+            stats["missed"] += int(late / period)
+
+        t0 = time.perf_counter()
+        stride, max_lines = self.SMOOTH_QUALITY[stats["quality"]]
+        if self._frame_index % stride == 0:
+            if self.screen_filled:
+                if self._scroll_origin is None:
+                    self._scroll_origin = deadline
+                # 位移按时间计算：降档或丢帧时速度不变，只是每次移动得更多
+                target = int(self.smooth_scroll * (deadline - self._scroll_origin))
+                if target > self._scroll_applied:
+                    self._shift_column(target - self._scroll_applied)
+                    self._scroll_applied = target
+            added = 0
+            while self.current_y < self.text_area_bottom and added < max_lines:
+                self.add_line()
+                added += 1
+        self._govern_frame(time.perf_counter() - t0, late)
+
+        # 下一帧对准固定网格；落后时直接跳到下一个未来的格点，不补帧
+        behind = int(math.floor((self.scheduler.clock() - self.start_time) / period)) + 1
+        self._frame_index = max(self._frame_index + 1, behind)
+        self.scheduler.call_at(self.start_time + self._frame_index * period, self._smooth_frame, name="smooth_frame")
+
+    def _govern_frame(self, cost, late):
+        """帧耗时或触发延迟的滑动平均超出预算就降一档；连续两秒都很轻松再升回一档"""
+        period = self.frame_period
+        self._frame_cost_ema += (cost - self._frame_cost_ema) * 0.1
+        self._frame_late_ema += (late - self._frame_late_ema) * 0.1
+        stats = self.scroll_stats
+        if self._frame_cost_ema > 0.6 * period or self._frame_late_ema > 0.5 * period:
+            self._calm_frames = 0
+            if stats["quality"] < len(self.SMOOTH_QUALITY) - 1:
+                stats["quality"] += 1
+                stats["downgrades"] += 1
+                self._frame_cost_ema = self._frame_late_ema = 0.0
+        elif self._frame_cost_ema < 0.2 * period and self._frame_late_ema < 0.2 * period:
+            self._calm_frames += 1
+            if self._calm_frames >= 2 * self.frame_rate and stats["quality"] > 0:
+                stats["quality"] -= 1
+                self._calm_frames = 0
+        else:
+            self._calm_frames = 0
 
     # -------------------- 进度条更新 -------------------- #
     def update_progress_time_based(self):
+        """
+        百分比由 progress_clock 按 start_time 起算的单调时钟得出，只有变化时才重绘，
+        下一次唤醒直接定在下一次变化的时刻。
+        """
+        now = self.scheduler.clock()
         if self.start_time is None:
-            self.start_time = time.monotonic()
-            self.last_percent_update = self.start_time
-        current_time = time.monotonic()
-        seconds_since_last_update = current_time - self.last_percent_update
-        if seconds_since_last_update >= 3 and self.progress_percent < 100:
-            self.progress_percent += 1
-            self.last_percent_update = current_time
-        self.progress_percent = min(100, self.progress_percent)
-        try:
-            self.canvas.itemconfig(self.progress_text_id, text=f"{self.progress_percent}%")
-        except Exception:
-            pass
-        self.update_progress_bar()
-        if self.progress_percent < 100:
-            self.root.after(self.progress_update_interval_ms, self.update_progress_time_based)
-        else:
-            try:
-                self.canvas.itemconfig(self.progress_text_id, fill="#FFFFFF")
-            except Exception:
-                pass
+            self.start_time = now
+            self.last_percent_update = now
+        elapsed = now - self.start_time
+        self._set_percent(self.progress_clock.percent_at(elapsed), now)
+        next_at = self.progress_clock.next_change_at(elapsed)
+        if next_at is not None:
+            self.scheduler.call_at(self.start_time + next_at, self.update_progress_time_based)
+        elif self.scene is not None:
+            self.scene.itemconfig(self.progress_text_id, fill="#FFFFFF")
 
-    def update_progress_bar(self):
-        if not self.bar_fill_id:
-            return
-        progress_width = (self.bar_width * (self.progress_percent / 100.0))
-        new_right = self.bar_left + progress_width
-        try:
-            self.canvas.coords(self.bar_fill_id, self.bar_left, self.bar_top, new_right, self.bar_bottom)
-        except Exception:
-            pass
+    def _set_percent(self, percent, now):
+        if percent != self.progress_percent:
+            self.progress_percent = percent
+            self.last_percent_update = now
+            self._show_percent()
+            self.update_progress_bar()
 
-        for sid in self.bar_slash_ids:
-            try:
-                self.canvas.delete(sid)
-            except Exception:
-                pass
-        self.bar_slash_ids = []
+    def _show_percent(self):
+        self.scene.itemconfig(self.progress_text_id, text=f"{self.progress_percent}%")
 
+    def _apply_percent_color(self):
+        self.scene.itemconfig(self.progress_text_id, fill="#%02x%02x%02x" % self.percent_color[:3])
+
+    def _slash_segments(self, progress_width):
+        """进度条斜线：返回 (线宽, [(x1, y1, x2, y2), ...])"""
+        segments = []
+        slash_width = max(4, int(self.bar_height / 4))
         if progress_width > 6:
             slash_spacing = 14
             slash_length = max(8, self.bar_height - 8)
-            slash_width = max(4, int(self.bar_height / 4))
             x = self.bar_left + slash_spacing / 2
-            max_x = new_right - 2
+            max_x = self.bar_left + progress_width - 2
             while x < max_x:
-                x1 = x - slash_length / 4
-                y1 = self.bar_bottom - 3
-                x2 = x + slash_length / 4
-                y2 = self.bar_top + 3
-                sid = self.canvas.create_line(x1, y1, x2, y2, fill="#ffffff", width=slash_width)
-                self.bar_slash_ids.append(sid)
+                segments.append((x - slash_length / 4, self.bar_bottom - 3,
+                                 x + slash_length / 4, self.bar_top + 3))
                 x += slash_spacing
+        return slash_width, segments
 
-        if hasattr(self, 'warning_triangle_id'):
-            self.canvas.tag_raise(self.warning_triangle_id)
-        if hasattr(self, 'warning_exclamation_id'):
-            self.canvas.tag_raise(self.warning_exclamation_id)
-        if hasattr(self, 'title_text_id'):
-            self.canvas.tag_raise(self.title_text_id)
-        if self.bar_bg_id:
-            try:
-                self.canvas.tag_raise(self.bar_bg_id)
-            except Exception:
-                pass
-        if self.bar_fill_id:
-            try:
-                self.canvas.tag_raise(self.bar_fill_id)
-            except Exception:
-                pass
-        for sid in self.bar_slash_ids:
-            try:
-                self.canvas.tag_raise(sid)
-            except Exception:
-                pass
-        if self.progress_text_id:
-            try:
-                self.canvas.tag_raise(self.progress_text_id)
-            except Exception:
-                pass
+    def _hatch_texture(self):
+        """
+        100% 时的整条斜线纹理（RGBA）及其左上角坐标，按进度条几何缓存。
+        有 NumPy 时按每个像素到最近斜线的垂直距离一次算出；否则用 _slash_segments 逐条画。
+        纹理（以及画布引擎里盖在上面的黑色遮罩）裁到进度条内框，不会压住外面的白色边框。
+        """
+        geometry = (self.bar_left, self.bar_top, self.bar_width, self.bar_height)
+        cached = self._hatch_textures.get(geometry)
+        if cached is not None:
+            return cached
+        slash_width, segments = self._slash_segments(self.bar_width)
+        ox = int(self.bar_left)
+        oy = int(self.bar_top)
+        size = (max(1, int(self.bar_right) - ox), max(1, int(self.bar_bottom) - oy))
+        if np is not None and segments:
+            slash_spacing = 14
+            x1, y1, x2, y2 = segments[0]
+            dx, dy = x2 - x1, y2 - y1
+            seg_len = math.hypot(dx, dy)
+            ys, xs = np.mgrid[0:size[1], 0:size[0]]
+            px = xs + ox + 0.5
+            py = ys + oy + 0.5
+            y_mid = (y1 + y2) / 2
+            # 把像素沿斜线方向平移到中线高度，再看离哪条斜线最近
+            t = px - (py - y_mid) * (dx / dy) - (self.bar_left + slash_spacing / 2)
+            k = np.clip(np.rint(t / slash_spacing), 0, len(segments) - 1)
+            cx = self.bar_left + slash_spacing / 2 + k * slash_spacing
+            rx, ry = px - cx, py - y_mid
+            across = np.abs(rx * dy - ry * dx) / seg_len
+            along = np.abs(rx * dx + ry * dy) / seg_len
+            alpha = ((across <= slash_width / 2) & (along <= seg_len / 2)).astype(np.uint8) * 255
+            texture = Image.new("RGBA", size, (255, 255, 255, 0))
+            texture.putalpha(Image.fromarray(alpha, "L"))
+        else:
+            texture = Image.new("RGBA", size, (0, 0, 0, 0))
+            d = ImageDraw.Draw(texture)
+            for (x1, y1, x2, y2) in segments:
+                d.line((x1 - ox, y1 - oy, x2 - ox, y2 - oy), fill="#ffffff", width=slash_width)
+        self._hatch_textures[geometry] = (texture, (ox, oy))
+        return texture, (ox, oy)
+
+    def _hatch_reveal_x(self, progress_width):
+        """斜线纹理揭开到的横坐标（画布坐标）；进度太短时不显示斜线"""
+        texture, (ox, oy) = self._hatch_texture()
+        if progress_width <= 6:
+            return ox
+        return min(ox + texture.width, int(round(self.bar_left + progress_width)))
+
+    def update_progress_bar(self):
+        if not self.bar_fill_id:
+            return
+        progress_width = (self.bar_width * (self.progress_percent / 100.0))
+        new_right = self.bar_left + progress_width
+        self.scene.coords(self.bar_fill_id, self.bar_left, self.bar_top, new_right, self.bar_bottom)
+
+        # 与宽度无关：只移动遮罩的左边
+        self._ensure_hatch_item()
+        texture, (ox, oy) = self._hatch_texture()
+        self.scene.coords(self.bar_cover_id, self._hatch_reveal_x(progress_width), oy,
+                          ox + texture.width, oy + texture.height)
+
+        # 三角形/标题在上，进度条斜线和百分比也可见；场景层在 flush 时只调整顺序不对的项
+        self.scene.set_top_order([
+            getattr(self, 'warning_triangle_id', None),
+            getattr(self, 'warning_exclamation_id', None),
+            getattr(self, 'title_text_id', None),
+            self.bar_bg_id,
+            self.bar_fill_id,
+            self.bar_hatch_id,
+            self.bar_cover_id,
+            self.progress_text_id,
+        ])
+        self.scene.request_flush()
+
+    # -------------------- 场景：游标顺序执行预编译事件 -------------------- #
+    def _start_scenario(self):
+        plan = self.scenario
+        self._scenario_cursor = 0
+        self._scenario_offset = 0.0
+        self._scenario_handlers = (self._scenario_percent, self._scenario_color, self._scenario_scroll,
+                                   self._scenario_name, self._scenario_end)
+        self.name_index = 0
+        self._prefetch_names(self.name_index)
+        if len(plan):
+            self.scheduler.call_at(self.start_time + plan.times[0], self._scenario_step, name="scenario")
+
+    def _scenario_step(self):
+        """执行所有已到期的事件，再只为下一个事件挂一次定时；每个事件只是一次下标递增和一次分派"""
+        plan = self.scenario
+        times, kinds, values, handlers = plan.times, plan.kinds, plan.values, self._scenario_handlers
+        deadline = self.scheduler.current_deadline
+        if deadline is None:
+            deadline = self.scheduler.clock()
+        due = deadline - self.start_time - self._scenario_offset + 1e-9
+        i = self._scenario_cursor
+        while True:
+            if i == len(times):
+                if not plan.loop_seconds:
+                    self._scenario_cursor = i
+                    return
+                # 100% 之后的尾段整体平移一个周期重复
+                i = plan.loop_from
+                self._scenario_offset += plan.loop_seconds
+                due -= plan.loop_seconds
+            if times[i] > due:
+                break
+            handlers[kinds[i]](values[i])
+            i += 1
+        self._scenario_cursor = i
+        self.scheduler.call_at(self.start_time + self._scenario_offset + times[i], self._scenario_step,
+                               name="scenario")
+
+    def _scenario_percent(self, percent):
+        self._set_percent(percent, self.scheduler.clock())
+
+    def _scenario_color(self, rgb):
+        self.error_color = ((rgb >> 16) & 255, (rgb >> 8) & 255, rgb & 255, 255)
+
+    def _scenario_scroll(self, _):
+        # 平滑滚动时整列由帧循环移动，场景只决定进度、文件名与颜色
+        if not self.smooth_scroll:
+            self._scroll_tick()
+
+    def _scenario_name(self, _):
+        if not self.name_lines:
+            return
+        idx = self._timeline(Timeline.NAME_LINE, self.name_index) % len(self.name_lines)
+        self.name_index = (idx + 1) % len(self.name_lines)
+        self._show_name_line_and_advance(idx)
+
+    def _scenario_end(self, rgb):
+        self.percent_color = ((rgb >> 16) & 255, (rgb >> 8) & 255, rgb & 255, 255)
+        self._apply_percent_color()
 
     # -------------------- name.txt 显示（保持原样） -------------------- #
     def start_name_scrolling(self):
-        for aid in self._name_after_ids:
-            try:
-                self.root.after_cancel(aid)
-            except Exception:
-                pass
-        self._name_after_ids = []
+        for timer in self._name_timers:
+            self.scheduler.cancel(timer)
+        self._name_timers = []
         self.name_index = 0
+        # 从开始时刻排，而不是第一帧渲染完之后的 clock()：同一 seed 的时间线与渲染耗时无关
+        self._next_triplet_at = self.start_time
+        self._prefetch_names(self.name_index)
         self._schedule_next_triplet()
 
     def _schedule_next_triplet(self):
+        """每秒一批：3 个随机时刻显示 3 行；批与批之间按绝对时间对齐，不累积漂移"""
         if not self.name_lines:
+            self._name_timers = []
             return
-        offsets = sorted([random.randint(0, 999) for _ in range(3)])
-        base_delay = 0
+        base = self._resync(Timeline.NAME_RESYNC, self._next_triplet_at)
+        offsets = sorted([self.rng.randint(0, 999) for _ in range(3)])
+        self._name_timers = []
         for off in offsets:
-            aid = self.root.after(base_delay + off, lambda idx=self.name_index: self._show_name_line_and_advance(idx))
-            self._name_after_ids.append(aid)
-            self.name_index = (self.name_index + 1) % len(self.name_lines)
-        aid_next = self.root.after(1000, self._schedule_next_triplet)
-        self._name_after_ids.append(aid_next)
+            off = self._timeline(Timeline.NAME_OFFSET, off, at=base)
+            idx = self._timeline(Timeline.NAME_LINE, self.name_index, at=base + off / 1000.0)
+            self._name_timers.append(self.scheduler.call_at(
+                base + off / 1000.0, self._show_name_line_and_advance, idx, name="name_line"))
+            self.name_index = (idx + 1) % len(self.name_lines)
+        self._next_triplet_at = base + 1.0
+        self._name_timers.append(self.scheduler.call_at(self._next_triplet_at, self._schedule_next_triplet))
 
     def _show_name_line_and_advance(self, idx):
         if self.current_name_text_id:
             try:
                 cid, img_ref = self.current_name_text_id
                 self.canvas.delete(cid)
-                if img_ref in self._image_refs:
-                    self._image_refs.remove(img_ref)
+                self._image_refs.release(img_ref)
             except Exception:
                 pass
             self.current_name_text_id = None
 
         if not self.name_lines:
             return
-        line = self.name_lines[idx % len(self.name_lines)]
+        idx %= len(self.name_lines)
+        line = self.name_lines[idx]
         start_y = int(self.bar_bottom + 50)
         center_x = int((self.bar_left + self.bar_right) / 2)
         tk_img, size = self.draw_smooth_text_image(line, font=self.pil_name_font, font_size=self.name_font_size,
-                                                   color=(255,255,255,255))
+                                                   color=(255,255,255,255), raster=self._take_prefetched(idx, line))
         img_w, img_h = size
         x = center_x - img_w // 2
         cid = self.canvas.create_image(x, start_y, image=tk_img, anchor='nw')
         self.current_name_text_id = (cid, tk_img)
+        self._prefetch_names(idx + 1)
+
+    # -------------------- name 行预渲染 -------------------- #
+    def _render_name_in_worker(self, text):
+        """在工作线程里执行：使用线程自己的字体对象渲染"""
+        font = getattr(self._worker_local, "font", None)
+        if font is None:
+            path = getattr(self.pil_name_font, "path", None)
+            font = ImageFont.truetype(path, self.name_font_size, index=getattr(self.pil_name_font, "index", 0)) \
+                if path else self.pil_name_font
+            self._worker_local.font = font
+        return self.render_line_raster(text, font=font, color=(255, 255, 255, 255))
+
+    def _take_prefetched(self, idx, line):
+        if self.name_prefetcher is None:
+            return None
+        key = self._raster_key(line, self.pil_name_font, self.name_font_size, (255, 255, 255, 255))
+        if key in self.raster_cache or self._in_atlas(line):
+            return None
+        return self.name_prefetcher.take(idx, line)
+
+    def _in_atlas(self, line):
+        atlas = self.raster_atlas
+        return atlas is not None and \
+            atlas.key(line, self.pil_name_font, self.name_font_size, (255, 255, 255, 255)) in atlas
+
+    def _prefetch_names(self, after_idx):
+        """把 after_idx 之后、尚未缓存的 name 行提交给线程池，直到队列满"""
+        prefetcher = self.name_prefetcher
+        if prefetcher is None or not self.name_lines:
+            return
+        n = len(self.name_lines)
+        if not prefetcher._queue:
+            self._prefetch_next = after_idx % n
+        for _ in range(prefetcher.depth):
+            if not prefetcher.has_room():
+                break
+            idx = self._prefetch_next % n
+            line = self.name_lines[idx]
+            if self._raster_key(line, self.pil_name_font, self.name_font_size, (255, 255, 255, 255)) \
+                    not in self.raster_cache and not self._in_atlas(line):
+                prefetcher.submit(idx, line)
+            self._prefetch_next = (idx + 1) % n
+
+    # -------------------- 插桩 HUD -------------------- #
+    def toggle_hud(self):
+        if self.probe is None:
+            return
+        self.hud_visible = not self.hud_visible
+        if self.hud_visible:
+            self._refresh_hud()
+        else:
+            self.scheduler.cancel(self._hud_timer)
+            self._hud_timer = None
+            self._draw_hud(None)
+
+    def _refresh_hud(self):
+        text = self.probe.format_hud()
+        if self.scroll_stats is not None:
+            st = self.scroll_stats
+            text += f"\nsmooth scroll  frames {st['frames']}  missed {st['missed']}  quality {st['quality']}"
+        if self.glitch is not None:
+            gs = self.glitch.stats()
+            text += f"\nglitch  cached {gs['entries']}  hits {gs['hits']}  generated {gs['generated']}  " \
+                    f"deferred {gs['deferred']}"
+        self._draw_hud(text)
+        self._hud_timer = self.scheduler.call_later(500, self._refresh_hud, name="hud")
+
+    def _draw_hud(self, text):
+        if text is None:
+            if self._hud_item_id:
+                self.scene.delete(self._hud_item_id)
+                self._hud_item_id = None
+            return
+        if self._hud_item_id:
+            self.scene.itemconfig(self._hud_item_id, text=text)
+        else:
+            self._hud_item_id = self.scene.create(
+                "text", self.screen_width - 10, 10, text=text, fill="#00ff66",
+                font=("Consolas", 11), anchor="ne", justify="left")
 
     # -------------------- 键盘 -------------------- #
     def on_key_press(self, event):
         if event.keysym == 'Escape':
-            for aid in self._name_after_ids:
-                try:
-                    self.root.after_cancel(aid)
-                except Exception:
-                    pass
-            self._name_after_ids = []
+            self.shutdown()
+        elif event.keysym == 'F3':
+            self.toggle_hud()
+
+    def shutdown(self):
+        if self.shared is not None:
+            # 任一屏幕按 Esc 都关闭全部窗口
+            self.shared.shutdown()
+            return
+        for peer in self.peers:
+            if peer.name_prefetcher is not None:
+                peer.name_prefetcher.shutdown()
+        self.scheduler.cancel_all()
+        self._name_timers = []
+        if self.corpus_watcher is not None:
+            self.corpus_watcher.stop()
+        if self.name_prefetcher is not None:
+            self.name_prefetcher.shutdown()
+        if self.raster_atlas is not None:
+            self.raster_atlas.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.probe is not None and self.instrument_json:
+            try:
+                extra = {}
+                if self.scroll_stats is not None:
+                    extra["smooth_scroll"] = self.scroll_stats
+                if self.glitch is not None:
+                    extra["glitch"] = self.glitch.stats()
+                self.probe.dump_json(self.instrument_json, extra)
+            except Exception:
+                pass
+        if self.root is not None:
             self.root.destroy()
 
     # -------------------- 运行 -------------------- #
-    def run(self):
-        self.start_time = time.monotonic()
+    def start(self, start_time=None):
+        # 多屏时所有屏幕用同一个开始时刻，进度完全同步
+        self.start_time = self.scheduler.clock() if start_time is None else start_time
         self.last_percent_update = self.start_time
-        self.update_progress_time_based()
-        self.update_display()
-        self.start_name_scrolling()
+        if self.scenario is not None:
+            self._start_scenario()
+        else:
+            self.update_progress_time_based()
+        self._next_scroll_at = self.start_time
+        if self.smooth_scroll:
+            self._start_smooth_scroll()
+        elif self.scenario is None:
+            # 第一次滚动同步执行，但按计划时刻记录（错误行号、滚动间隔都记在开始时刻上）
+            self.scheduler.run_as(self._next_scroll_at, self.update_display)
+        if self.scenario is None:
+            self.start_name_scrolling()
+        if self.corpus_watcher is not None:
+            self.corpus_watcher.start()
+            self._apply_reloads()
+        for peer in self.peers:
+            peer.start(self.start_time)
+        self.startup.mark("start")
+        if self.startup_trace:
+            print(self.startup.report(), file=sys.stderr)
+
+    @classmethod
+    def on_all_screens(cls, **options):
+        """每个显示器一个窗口，各自按自己的尺寸布局；只探测到一个显示器时与普通启动相同"""
+        monitors = _detect_monitors()
+        if len(monitors) <= 1:
+            return cls(**options)
+        primary = cls(screen=monitors[0], **options)
+        seed = options.pop("seed", None)
+        for i, monitor in enumerate(monitors[1:], 1):
+            # 给定 seed 时各屏仍可复现，但滚动与文件名节奏彼此不同
+            primary.peers.append(cls(screen=monitor, shared=primary,
+                                     seed=None if seed is None else seed + i, **options))
+        return primary
+
+    def run(self):
+        self.start()
         self.root.mainloop()
 
+    def run_unpaced(self, until=None):
+        """
+        不按真实时间等待：逻辑时钟直接跳到下一个截止时间执行，每个事件后刷新一次窗口。
+        用于回放分析，默认在进度到 100% 时结束。
+        """
+        self.scheduler.cancel_all()
+        self.scheduler.root = None
+        self._virtual_now = 0.0
+        self.start()
+        until = self.progress_clock.total_seconds if until is None else until
+        deadline = self.scheduler.next_deadline()
+        try:
+            while deadline is not None and deadline <= until:
+                self._virtual_now = max(self._virtual_now, deadline)
+                self.scheduler.run_due(deadline)
+                self.scene.flush()
+                self.root.update()
+                deadline = self.scheduler.next_deadline()
+        except tk.TclError:
+            return  # 中途按 Esc 关闭了窗口
+        self.shutdown()
+
+
+# -------------------- 合成引擎：整帧一张 PhotoImage -------------------- #
+class CompositorErrorSimulator(FixedTransparentErrorSimulator):
+    """
+    与画布引擎效果相同，但边框、错误滚动列、百分比、进度条、name 行全部由 FrameCompositor
+    合成到一块缓冲，画布上只有一个图片项；每帧只重画脏区域，也只把这些区域拷进 PhotoImage。
+    """
+
+    EARLY_BORDER = False
+
+    def draw_outline_border(self):
+        layout = self._border_layout()
+        left, top, right, bottom = layout["bar_frame"]
+        self._set_bar_geometry(left + 2, top + 2, right - 2, bottom - 2)
+        self._percent_center = layout["percent_center"]
+        self._percent_font = FONT_REGISTRY.load(37)
+        self._shown_percent = None
+        self._bar_drawn_width = None
+        # 错误列是纵向环形缓冲：屏幕第 0 行对应 _column 的第 _column_top 行，滚动只移动这个起点
+        self._column = Image.new("RGBA", (max(1, self.text_area_right), self.screen_height), (0, 0, 0, 0))
+        self._column_top = 0
+
+        self.compositor = FrameCompositor(self.screen_width, self.screen_height,
+                                          self._render_background(layout),
+                                          layers=("errors", "bar", "percent", "name"))
+        self.frame_stats = {"frames": 0, "compose_seconds": 0.0, "blit_seconds": 0.0, "blit_pixels": 0}
+        self._present_pending = False
+        self._blit_patches = {}  # 尺寸 -> 暂存 PhotoImage（不上屏，贴图很快）
+        self._attach_frame()
+        self._show_percent()
+
+    def _attach_frame(self):
+        # 画布上唯一的图片项
+        self._frame_photo = ImageTk.PhotoImage(self.compositor.frame)
+        self.frame_item_id = self.canvas.create_image(0, 0, image=self._frame_photo, anchor='nw')
+
+    def _render_background(self, layout):
+        """静态部分（边框、标题、三角形、百分比底框、进度条外框）只画一次"""
+        bg = Image.new("RGBA", (self.screen_width, self.screen_height), (0, 0, 0, 255))
+        d = ImageDraw.Draw(bg)
+        d.rectangle(layout["border"], outline="#fe4f4e", width=4)
+        d.rectangle(layout["inner"], fill="#fe4f4e")
+        d.rectangle(layout["percent_box"], fill="#450e0f")
+        d.polygon(layout["triangle"], fill="white", outline="white")
+        _draw_anchored_text(d, layout["exclamation"], "!", FONT_REGISTRY.load(24), "#fe4f4e", "mm")
+        _draw_anchored_text(d, layout["title"], "数据删除进度", FONT_REGISTRY.load(19), "white", "lm")
+        d.rectangle(layout["bar_frame"], outline="white", width=3)
+        return bg
+
+    def _line_raster(self, text, font, font_size, color, raster=None):
+        # 合成模式下 raster_cache 存的是 PIL 图片而不是 PhotoImage
+        key = self._raster_key(text, font, font_size, color)
+        img = self.raster_cache.get(key)
+        if img is None:
+            img = self._rasterize(text, font, font_size, color, raster)
+            self.raster_cache.put(key, img)
+        return img
+
+    # -------------------- 帧提交 -------------------- #
+    def _request_present(self):
+        if not self._present_pending:
+            self._present_pending = True
+            self.root.after_idle(self._present)
+
+    def _present(self):
+        self._present_pending = False
+        t0 = time.perf_counter()
+        boxes = self.compositor.compose()
+        if not boxes:
+            return
+        t1 = time.perf_counter()
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes)
+        if area * 2 >= self.screen_width * self.screen_height:
+            # 大半屏都变了：整帧贴一次比逐块拷贝更省
+            self._frame_photo.paste(self.compositor.frame)
+        else:
+            for box in boxes:
+                self._blit(box)
+        t2 = time.perf_counter()
+        self.frame_stats["frames"] += 1
+        self.frame_stats["blit_pixels"] += area
+        self.frame_stats["compose_seconds"] += t1 - t0
+        self.frame_stats["blit_seconds"] += t2 - t1
+        if self.probe is not None:
+            now = self.scheduler.clock()
+            self.probe.record("present", now, now, t2 - t0)
+
+    def _blit(self, box):
+        """
+        只把 box 区域送进 Tk：ImageTk.PhotoImage.paste 不接受区域参数，
+        所以先贴到同尺寸的暂存图，再用 Tk 的 photo copy 拷到帧图对应位置。
+        """
+        x1, y1, x2, y2 = box
+        patch_img = self.compositor.frame.crop(box)
+        patch = self._blit_patches.get(patch_img.size)
+        if patch is None:
+            if len(self._blit_patches) >= 32:
+                self._blit_patches.clear()
+            patch = self._blit_patches[patch_img.size] = ImageTk.PhotoImage(patch_img)
+        else:
+            patch.paste(patch_img)
+        patch.tk.call(str(self._frame_photo), "copy", str(patch), "-to", x1, y1, "-compositingrule", "set")
+
+    def _draw_hud(self, text):
+        if text is None:
+            self.compositor.set_layer("hud", None)
+        else:
+            font = FONT_REGISTRY.load(13)
+            d = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+            box = d.multiline_textbbox((0, 0), text, font=font)
+            img = Image.new("RGBA", (box[2] + 8, box[3] + 8), (0, 0, 0, 160))
+            ImageDraw.Draw(img).multiline_text((4, 4), text, font=font, fill="#00ff66")
+            self.compositor.set_layer("hud", img, (self.screen_width - img.width - 10, 10))
+        self._request_present()
+
+    # -------------------- 错误滚动列 -------------------- #
+    def add_line(self):
+        new_line = self.get_next_line()
+        variant, img = self._glitch_line(new_line)
+        if variant is None:
+            img = self._line_raster(new_line, self.pil_font, self.default_font_size, self.error_color)
+        x = self.text_area_left
+        y = int(self.current_y)
+        if x + img.width > self._column.width:
+            # 行比当前列宽：扩展列缓冲（环形起点不变）
+            wider = Image.new("RGBA", (x + img.width, self._column.height), (0, 0, 0, 0))
+            wider.paste(self._column, (0, 0))
+            self._column = wider
+        height = self._column.height
+        visible = min(img.height, height - y)
+        if visible > 0:
+            # 超出屏幕底部的部分直接丢弃；跨过缓冲底部的部分绕回顶部
+            row = (y + self._column_top) % height
+            part = img if visible == img.height else img.crop((0, 0, img.width, visible))
+            self._column.paste(part, (x, row))
+            if row + visible > height:
+                self._column.paste(part, (x, row - height))
+        self.text_items.append(None, y + self.scroll_offset, None, img.height)
+        self.compositor.set_layer("errors", self._column, (0, 0), dirty=(x, y, x + img.width, y + img.height),
+                                  origin=self._column_top)
+        self._request_present()
+
+        increment = img.height
+        if increment <= 0:
+            increment = getattr(self.pil_font, "size", self.default_font_size)
+        self.current_y += increment
+        if not self.screen_filled and self.current_y >= self.text_area_bottom:
+            self.screen_filled = True
+
+    def scroll_all_text_once(self):
+        if not self.text_items:
+            self.add_line()
+            return
+        step = self.text_items.head()[3]
+        if step <= 0:
+            step = getattr(self.pil_font, "size", self.default_font_size)
+
+        self._shift_column(step)
+        self.add_line()
+
+    def _shift_column(self, step):
+        # 整列上移 step：只清掉滚出顶部的 step 行（它们绕回来成为底部的新空行），再挪动环形起点
+        w, h = self._column.size
+        step = int(step)
+        if step >= h:
+            self._column.paste((0, 0, 0, 0), (0, 0, w, h))
+        else:
+            top = self._column_top
+            self._column.paste((0, 0, 0, 0), (0, top, w, min(h, top + step)))
+            if top + step > h:
+                self._column.paste((0, 0, 0, 0), (0, 0, w, top + step - h))
+        self._column_top = (self._column_top + step) % h
+        self.compositor.set_layer("errors", self._column, (0, 0), origin=self._column_top)
+        self._request_present()
+        self.scroll_offset += step
+        while self.text_items:
+            _, y_pos, _, height = self.text_items.head()
+            if y_pos - self.scroll_offset + height >= self.text_area_top:
+                break
+            self.text_items.popleft()
+        self.current_y -= step
+
+    # -------------------- 百分比 / 进度条 / name 行 -------------------- #
+    def _show_percent(self):
+        if self.progress_percent == self._shown_percent:
+            return
+        self._shown_percent = self.progress_percent
+        img = self.render_line_raster(f"{self.progress_percent}%", font=self._percent_font, color=self.percent_color)
+        cx, cy = self._percent_center
+        self.compositor.set_layer("percent", img, (int(cx - img.width / 2), int(cy - img.height / 2)))
+        self._request_present()
+
+    def _apply_percent_color(self):
+        self._shown_percent = None
+        self._show_percent()
+
+    def update_progress_bar(self):
+        progress_width = self.bar_width * (self.progress_percent / 100.0)
+        if progress_width == self._bar_drawn_width:
+            return
+        self._bar_drawn_width = progress_width
+        texture, (ox, oy) = self._hatch_texture()
+        reveal = self._hatch_reveal_x(progress_width) - ox
+        img = texture.crop((0, 0, reveal, texture.height)) if reveal > 0 else None
+        self.compositor.set_layer("bar", img, (ox, oy))
+        self._request_present()
+
+    def _show_name_line_and_advance(self, idx):
+        if not self.name_lines:
+            self.compositor.set_layer("name", None)
+            return
+        idx %= len(self.name_lines)
+        line = self.name_lines[idx]
+        img = self._line_raster(line, self.pil_name_font, self.name_font_size, (255, 255, 255, 255),
+                                raster=self._take_prefetched(idx, line))
+        start_y = int(self.bar_bottom + 50)
+        center_x = int((self.bar_left + self.bar_right) / 2)
+        self.compositor.set_layer("name", img, (center_x - img.width // 2, start_y))
+        self._request_present()
+        self._prefetch_names(idx + 1)
+
+
+# -------------------- 离屏渲染（无窗口，虚拟时钟） -------------------- #
+class HeadlessErrorSimulator(CompositorErrorSimulator):
+    """
+    不创建 Tk 窗口，用合成引擎把同一画面渲染到内存中的 PIL 帧。
+    时间由 virtual_time 驱动：render_frame(t) 会按顺序触发 t 之前的所有定时事件再合成。
+    相同 seed、尺寸与文本文件下，同一时刻得到的帧完全一致，可用于对比测试和基准。
+    """
+
+    # 布局按屏幕比例计算，再小的话标题栏、百分比框和进度条会互相重叠甚至宽高为负
+    MIN_SIZE = (320, 240)
+    # 行数随后台扫描增长、字体随扫描完成时机而变的话，同一时刻的帧就取决于扫描快慢，不再可复现
+    BACKGROUND_INDEX = False
+
+    def __init__(self, width=1920, height=1080, seed=0, **kwargs):
+        if width < self.MIN_SIZE[0] or height < self.MIN_SIZE[1]:
+            raise ValueError(f"frame size {width}x{height} is too small; "
+                             f"minimum is {self.MIN_SIZE[0]}x{self.MIN_SIZE[1]}")
+        self.virtual_time = 0.0
+        self._headless_size = (int(width), int(height))
+        # 故障变体不受实时预算限制：是否生成取决于耗时的话，同一 seed 的帧就不再可复现
+        kwargs["glitch_budget_ms"] = None
+        super().__init__(seed=seed, **kwargs)
+
+    def _create_window(self):
+        self.root = None
+        self.canvas = None
+        self.screen_width, self.screen_height = self._headless_size
+
+    def _now(self):
+        return self.virtual_time
+
+    def _attach_frame(self):
+        pass
+
+    def _request_present(self):
+        # 由 render_frame 主动合成
+        pass
+
+    def run(self):
+        raise RuntimeError("headless simulator has no window; use start() + render_frame()")
+
+    def advance_to(self, t):
+        """把虚拟时钟推进到 t 秒，期间到期的事件按截止时间顺序触发"""
+        if self.start_time is None:
+            self.start()
+        deadline = self.scheduler.next_deadline()
+        while deadline is not None and deadline <= t:
+            self.virtual_time = max(self.virtual_time, deadline)
+            self.scheduler.run_due(deadline)
+            deadline = self.scheduler.next_deadline()
+        self.virtual_time = max(self.virtual_time, t)
+
+    def render_frame(self, t):
+        """返回模拟时间 t 秒时的整帧（RGBA PIL Image 的拷贝）"""
+        self.advance_to(t)
+        self.compositor.compose()
+        self.frame_stats["frames"] += 1
+        return self.compositor.frame.copy()
+
+    def save_frame(self, t, path):
+        """PNG 按扩展名保存，其它扩展名写原始 RGBA 字节"""
+        frame = self.render_frame(t)
+        if path.lower().endswith(".png"):
+            frame.save(path)
+        else:
+            with open(path, "wb") as f:
+                f.write(frame.tobytes())
+        return frame
+
+
+def _parse_size(text):
+    import argparse
+    w, _, h = text.lower().partition("x")
+    try:
+        size = int(w), int(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}") from None
+    min_w, min_h = HeadlessErrorSimulator.MIN_SIZE
+    if size[0] < min_w or size[1] < min_h:
+        raise argparse.ArgumentTypeError(f"{text} is too small; minimum is {min_w}x{min_h}")
+    return size
+
+
+def _parse_stall(text):
+    """--stall PERCENT:SECONDS，百分比 0~100 的整数，秒数为有限的非负数"""
+    import argparse
+    pct, sep, sec = text.partition(":")
+    try:
+        stall = int(pct), float(sec)
+    except ValueError:
+        stall = None
+    if not sep or stall is None or not math.isfinite(stall[1]):
+        raise argparse.ArgumentTypeError(f"expected PERCENT:SECONDS, got {text!r}")
+    if not 0 <= stall[0] <= 100 or stall[1] < 0:
+        raise argparse.ArgumentTypeError(f"{text}: percent must be 0-100 and seconds >= 0")
+    return stall
+
+
+ENGINES = {
+    "canvas": FixedTransparentErrorSimulator,
+    "compositor": CompositorErrorSimulator,
+}
+
 
 if __name__ == "__main__":
-    app = FixedTransparentErrorSimulator(total_duration_seconds=30, progress_update_interval_ms=100)
-    app.run()
+    import argparse
+    parser = argparse.ArgumentParser(description="来古士删除数据模拟器")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="canvas",
+                        help="canvas：每行一个画布项；compositor：整帧合成为一张图片")
+    parser.add_argument("--duration", type=float, default=300,
+                        help="进度从 0%% 到 100%% 的时长（秒，不含停顿），默认 300 即每 3 秒 1%%")
+    parser.add_argument("--easing", choices=sorted(EASINGS), default="linear", help="进度曲线")
+    parser.add_argument("--stall", type=_parse_stall, action="append", default=[], metavar="PERCENT:SECONDS",
+                        help="到达 PERCENT 后停顿 SECONDS 秒，可重复")
+    parser.add_argument("--instrument", action="store_true",
+                        help="记录每个定时回调的触发延迟与执行耗时，F3 切换屏幕统计")
+    parser.add_argument("--instrument-json", metavar="PATH", help="退出时把定时统计写成 JSON（隐含 --instrument）")
+    parser.add_argument("--persist-line-index", action="store_true",
+                        help="把 error.txt / name.txt 的行偏移索引存为 .idx 文件，下次启动直接读入")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="运行中监视 error.txt / name.txt，改动后无需重启即可换入新内容")
+    parser.add_argument("--name-prefetch", type=int, default=6, metavar="N",
+                        help="后台提前渲染的 name 行数，0 表示关闭")
+    parser.add_argument("--raster-atlas", nargs="?", const=".raster_atlas", default=None, metavar="DIR",
+                        help="把渲染好的行图存进磁盘图集（默认目录 .raster_atlas），下次启动直接复用")
+    parser.add_argument("--raster-atlas-mb", type=int, default=64, metavar="MB", help="磁盘图集大小上限")
+    parser.add_argument("--glyph-atlas", action="store_true",
+                        help="逐字形缓存并用 NumPy 拼行，几乎每行都不同时更快（需要 numpy）")
+    parser.add_argument("--record", metavar="PATH", help="把所有随机决定和显示的内容索引录成二进制时间线")
+    parser.add_argument("--replay", metavar="PATH", help="按录制的时间线重放")
+    parser.add_argument("--replay-speed", type=float, default=1.0, metavar="X",
+                        help="回放倍速；0 表示不限速，逐事件尽快执行（用于分析）")
+    parser.add_argument("--all-screens", action="store_true",
+                        help="每个显示器一个窗口，共用行图缓存、字体、调度器与时钟")
+    parser.add_argument("--smooth-scroll", type=float, default=None, metavar="PX_PER_S",
+                        help="错误列按该速度（像素/秒）连续平滑滚动，而不是每 0.3~0.9 秒跳一整行")
+    parser.add_argument("--fps", type=float, default=60, help="平滑滚动的目标帧率，如 60、120")
+    parser.add_argument("--startup-trace", action="store_true", help="启动后打印各阶段耗时")
+    parser.add_argument("--font-index", default=".font_index.json", metavar="PATH",
+                        help="系统字体索引文件：首次扫描字体目录并记录字符覆盖，之后直接读入，按文本实际字符挑字体")
+    parser.add_argument("--no-font-index", action="store_true", help="不扫描系统字体，只用内置候选字体列表")
+    parser.add_argument("--glitch", action="store_true",
+                        help="错误行叠加扫描线撕裂、RGB 分离、块状损坏，随进度加强（需要 numpy）")
+    parser.add_argument("--glitch-budget-ms", type=float, default=4.0, metavar="MS",
+                        help="每帧用于生成新故障变体的时间上限，超出时该行先显示原图")
+    parser.add_argument("--scenario", metavar="PATH",
+                        help="场景文件（.json 或 .toml）：分阶段描述进度曲线、停顿、滚动间隔、文件名节奏、颜色和 100%% 后的状态")
+    parser.add_argument("--check-scenario", action="store_true", help="只校验并编译 --scenario，打印各阶段时段与事件数后退出")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，指定后动画可复现")
+    parser.add_argument("--headless", action="store_true", help="不开窗口，把指定时刻的画面渲染到文件")
+    parser.add_argument("--at", type=float, action="append", default=[], metavar="SECONDS",
+                        help="离屏渲染的模拟时刻（秒），可重复")
+    parser.add_argument("--out", default="frame_{t}.png",
+                        help="离屏渲染输出路径，{t} 替换为时刻；.png 以外的扩展名写原始 RGBA")
+    parser.add_argument("--size", type=_parse_size, default=(1920, 1080), help="离屏渲染分辨率，如 1920x1080")
+    args = parser.parse_args()
+    scenario = None
+    if args.scenario:
+        try:
+            scenario = Scenario.load(args.scenario)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        if args.check_scenario:
+            print(scenario.compile(args.seed).describe())
+            sys.exit(0)
+    elif args.check_scenario:
+        parser.error("--check-scenario needs --scenario")
+    options = dict(total_duration_seconds=args.duration, progress_update_interval_ms=100,
+                   progress_easing=args.easing, progress_stalls=args.stall,
+                   persist_line_index=args.persist_line_index, hot_reload=args.hot_reload,
+                   name_prefetch=args.name_prefetch, raster_atlas_dir=args.raster_atlas,
+                   raster_atlas_mb=args.raster_atlas_mb, glyph_atlas=args.glyph_atlas,
+                   record_path=args.record, replay_path=args.replay, smooth_scroll=args.smooth_scroll,
+                   frame_rate=args.fps, startup_trace=args.startup_trace,
+                   font_index=None if args.no_font_index else args.font_index, scenario=scenario,
+                   glitch=args.glitch, glitch_budget_ms=args.glitch_budget_ms)
+    if args.headless:
+        sim = HeadlessErrorSimulator(*args.size, seed=args.seed if args.seed is not None else 0, **options)
+        for t in sorted(args.at or [0.0]):
+            path = args.out.format(t=f"{t:g}")
+            sim.save_frame(t, path)
+            print(path)
+        sim.shutdown()
+    else:
+        speed = args.replay_speed if args.replay else 1.0
+        engine = ENGINES[args.engine]
+        create = engine.on_all_screens if args.all_screens else engine
+        app = create(seed=args.seed, instrument=args.instrument, instrument_json=args.instrument_json,
+                     time_scale=speed or 1.0, **options)
+        if speed <= 0:
+            app.run_unpaced()
+        else:
+            app.run()
@@ -0,0 +1,229 @@
+import argparse
+import importlib
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+
+# 主程序文件名带中文，按模块名导入
+sim_module = importlib.import_module("Pillow的方法")
+
+SCREENS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "ultrawide": (3440, 1440),
+}
+FONT_SIZES = (16, 24)
+CORPUS_SIZES = (78, 1000, 100000)
+
+
+# -------------------- 无显示器替身：记录每一次 Tcl 调用 -------------------- #
+class RecordingCanvas:
+    """代替 tk.Canvas：不画任何东西，只统计每种方法被调用的次数"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._ids = itertools.count(1)
+
+    def total(self):
+        return sum(self.calls.values())
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.calls[name] += 1
+            if name.startswith("create_"):
+                return next(self._ids)
+            return None
+        return record
+
+
+class RecordingRoot:
+    """代替 tk.Tk：after 只记录不执行，基准里由脚本直接调用各个方法"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._ids = itertools.count(1)
+
+    def after(self, delay, callback=None, *args):
+        self.calls["after"] += 1
+        return f"after#{next(self._ids)}"
+
+    def after_idle(self, callback, *args):
+        self.calls["after_idle"] += 1
+        return f"after#{next(self._ids)}"
+
+    def after_cancel(self, after_id):
+        self.calls["after_cancel"] += 1
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def update(self):
+        self.calls["update"] += 1
+
+    def destroy(self):
+        pass
+
+
+class BenchSimulator(sim_module.FixedTransparentErrorSimulator):
+    """画布引擎本身不变，只把窗口、画布和 PhotoImage 换成记录用的替身"""
+
+    def __init__(self, width, height, **kwargs):
+        self._bench_size = (width, height)
+        super().__init__(seed=0, **kwargs)
+
+    def _create_window(self):
+        self.root = RecordingRoot()
+        self.canvas = RecordingCanvas()
+        self.screen_width, self.screen_height = self._bench_size
+
+    def _make_photo(self, img):
+        # PhotoImage 需要 Tk 解释器；这里保留 PIL 图片本身
+        return img
+
+
+def make_corpus(lines, size, tag):
+    """把真实文本循环扩展到 size 行，超出部分加后缀保证每行不同"""
+    if not lines:
+        lines = [""]
+    out = []
+    for i in range(size):
+        base = lines[i % len(lines)]
+        out.append(base if i < len(lines) else f"{base} #{tag}{i}")
+    return out
+
+
+# -------------------- 计时 -------------------- #
+def measure(sim, name, fn, iterations):
+    before = sim.canvas.total()
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+        # 场景层本来在 after_idle 里每帧提交一次，这里每次调用后手动提交，计入 Tcl 调用
+        sim.scene.flush()
+    elapsed = time.perf_counter() - t0
+    return {
+        "op": name,
+        "iterations": iterations,
+        "us_per_call": elapsed / iterations * 1e6,
+        "tcl_calls_per_call": (sim.canvas.total() - before) / iterations,
+    }
+
+
+def run_scenario(screen, font_size, corpus_size, iterations):
+    width, height = SCREENS[screen]
+    sim = BenchSimulator(width, height)
+    sim.default_font_size = font_size
+    sim.pil_font = sim._load_font(font_size)
+    sim.error_lines = make_corpus(sim.error_lines, corpus_size, "e")
+    sim.name_lines = make_corpus(sim.name_lines, corpus_size, "n")
+    sim.name_index = 0
+
+    results = []
+    # 填满屏幕：add_line 的冷启动代价
+    fill = 0
+    t0 = time.perf_counter()
+    before = sim.canvas.total()
+    while not sim.screen_filled:
+        sim.add_line()
+        sim.scene.flush()
+        fill += 1
+    results.append({
+        "op": "add_line",
+        "iterations": fill,
+        "us_per_call": (time.perf_counter() - t0) / max(1, fill) * 1e6,
+        "tcl_calls_per_call": (sim.canvas.total() - before) / max(1, fill),
+    })
+    results.append(measure(sim, "scroll_all_text_once", sim.scroll_all_text_once, iterations))
+
+    def bar_tick():
+        sim.progress_percent = (sim.progress_percent + 1) % 101
+        sim.update_progress_bar()
+    sim.progress_percent = 50
+    results.append(measure(sim, "update_progress_bar", bar_tick, iterations))
+
+    name_idx = itertools.count()
+    results.append(measure(sim, "_show_name_line_and_advance",
+                           lambda: sim._show_name_line_and_advance(next(name_idx)), iterations))
+
+    texts = itertools.cycle(sim.name_lines)
+    results.append(measure(sim, "draw_smooth_text_image",
+                           lambda: sim.draw_smooth_text_image(next(texts), font=sim.pil_font,
+                                                              font_size=font_size, color=(254, 25, 38, 255)),
+                           iterations))
+    scenario = f"{screen}/font{font_size}/corpus{corpus_size}"
+    for r in results:
+        r["scenario"] = scenario
+    return results
+
+
+# -------------------- 与基线比较 -------------------- #
+def compare(results, baseline, tolerance):
+    """Tcl 调用数只要变多就算回退；耗时超过基线 (1 + tolerance) 倍算回退"""
+    old = {(r["scenario"], r["op"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = old.get((r["scenario"], r["op"]))
+        if b is None:
+            continue
+        if r["tcl_calls_per_call"] > b["tcl_calls_per_call"] + 1e-9:
+            regressions.append(f'{r["scenario"]} {r["op"]}: tcl calls {b["tcl_calls_per_call"]:.2f} -> '
+                               f'{r["tcl_calls_per_call"]:.2f}')
+        if r["us_per_call"] > b["us_per_call"] * (1 + tolerance):
+            regressions.append(f'{r["scenario"]} {r["op"]}: {b["us_per_call"]:.1f}us -> {r["us_per_call"]:.1f}us')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="逐帧热点路径基准（无需显示器）")
+    parser.add_argument("--screens", nargs="+", choices=sorted(SCREENS), default=sorted(SCREENS))
+    parser.add_argument("--font-sizes", nargs="+", type=int, default=list(FONT_SIZES))
+    parser.add_argument("--corpus-sizes", nargs="+", type=int, default=list(CORPUS_SIZES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", default="bench_results.json", help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="与该基线 JSON 比较，出现回退时返回码为 1")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="耗时允许比基线慢的比例")
+    args = parser.parse_args(argv)
+
+    results = []
+    for screen in args.screens:
+        for font_size in args.font_sizes:
+            for corpus_size in args.corpus_sizes:
+                for r in run_scenario(screen, font_size, corpus_size, args.iterations):
+                    results.append(r)
+                    print(f'{r["scenario"]:<28} {r["op"]:<28} {r["us_per_call"]:>10.1f} us '
+                          f'{r["tcl_calls_per_call"]:>8.2f} tcl')
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"baseline not found: {args.baseline}")
+            return 1
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
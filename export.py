@@ -0,0 +1,180 @@
+import argparse
+import importlib
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+# 主程序文件名带中文，按模块名导入
+sim_module = importlib.import_module("Pillow的方法")
+
+FRAME_NAME = "frame_{frame:06d}.png"
+FRAME_PATTERN = "frame_%06d.png"
+# 没有 ffmpeg 时 GIF/APNG 由 Pillow 合成，它会把全部帧（调色板化后约 宽×高 字节/帧）留在内存里
+PILLOW_MAX_BYTES = 256 << 20
+
+
+# -------------------- 工作进程：每个进程一个离屏模拟器 -------------------- #
+# 所有进程使用同一个 seed，从 0 秒快进到各自区间的起点；事件按截止时间顺序触发，
+# 随机数消耗顺序与单进程完全相同，因此各区间的帧首尾可以无缝拼接。
+_worker = {}
+
+
+def _init_worker(size, seed, options):
+    _worker.update(size=size, seed=seed, options=options, sim=None)
+
+
+def _worker_sim(start_time):
+    sim = _worker["sim"]
+    if sim is None or sim.virtual_time > start_time:
+        if sim is not None:
+            sim.shutdown()
+        sim = _worker["sim"] = sim_module.HeadlessErrorSimulator(*_worker["size"], seed=_worker["seed"],
+                                                                 **_worker["options"])
+    return sim
+
+
+def render_chunk(task):
+    """渲染 [start, stop) 范围的帧并写成 PNG，返回 (帧数, 耗时)"""
+    start, stop, fps, directory = task
+    t0 = time.perf_counter()
+    sim = _worker_sim(start / fps)
+    for frame in range(start, stop):
+        image = sim.render_frame(frame / fps)
+        image.convert("RGB").save(os.path.join(directory, FRAME_NAME.format(frame=frame)), compress_level=1)
+    return stop - start, time.perf_counter() - t0
+
+
+def split_frames(total, chunk):
+    return [(start, min(total, start + chunk)) for start in range(0, total, chunk)]
+
+
+def frame_count(fps, seed, options):
+    if options.get("scenario") is not None:
+        probe = options["scenario"].compile(seed)
+    else:
+        probe = sim_module.ProgressClock(options.get("total_duration_seconds", 300),
+                                         easing=options.get("progress_easing", "linear"),
+                                         stalls=options.get("progress_stalls", ()))
+    # 最后一帧停在 100%
+    return int(math.ceil(probe.total_seconds * fps)) + 1
+
+
+def render_frames(directory, size, fps, seed, options, workers, chunk):
+    """在进程池里渲染整段序列，返回总帧数"""
+    total = frame_count(fps, seed, options)
+    tasks = [(start, stop, fps, directory) for start, stop in split_frames(total, chunk)]
+    done = 0
+    t0 = time.perf_counter()
+    # imap 按顺序派发区间，同一进程拿到的区间起点递增，快进可以接着上次的模拟继续
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(size, seed, options)) as pool:
+        for count, _ in pool.imap(render_chunk, tasks):
+            done += count
+            elapsed = time.perf_counter() - t0
+            print(f"\r{done}/{total} frames  {done / max(elapsed, 1e-9):.1f} fps", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return total
+
+
+def _frames(directory, total):
+    for frame in range(total):
+        with Image.open(os.path.join(directory, FRAME_NAME.format(frame=frame))) as image:
+            image.load()
+            yield image
+
+
+def pillow_fits(total, size):
+    """没有 ffmpeg 时，Pillow 能否在 PILLOW_MAX_BYTES 以内合成这么多帧"""
+    return total * size[0] * size[1] <= PILLOW_MAX_BYTES
+
+
+def assemble(directory, total, fps, out):
+    """
+    把帧目录合成为 GIF / APNG / MP4。有 ffmpeg 时三种格式都由它逐帧流式编码，内存与帧数无关：
+    GIF 先单独跑一遍 palettegen 得到全局调色板，再用 paletteuse 编码（单遍 split 会让 ffmpeg 缓存全部帧）。
+    没有 ffmpeg 时 MP4 无法生成，GIF/APNG 退回 Pillow（调用方先用 pillow_fits 检查帧数）。
+    """
+    ext = os.path.splitext(out)[1].lower()
+    ffmpeg = shutil.which("ffmpeg")
+    frames_in = ["-framerate", str(fps), "-i", os.path.join(directory, FRAME_PATTERN)]
+    run = [ffmpeg, "-y", "-loglevel", "error"]
+    if ext == ".mp4":
+        if ffmpeg is None:
+            raise SystemExit("ffmpeg not found; use a frame directory as --out and encode it yourself")
+        subprocess.run(run + frames_in + ["-c:v", "libx264", "-pix_fmt", "yuv420p", out], check=True)
+        return
+    if ffmpeg is not None:
+        if ext == ".gif":
+            palette = os.path.join(directory, "palette.png")
+            subprocess.run(run + frames_in + ["-vf", "palettegen", palette], check=True)
+            subprocess.run(run + frames_in + ["-i", palette, "-lavfi", "paletteuse", "-loop", "0", out],
+                           check=True)
+        else:
+            subprocess.run(run + frames_in + ["-plays", "0", "-f", "apng", out], check=True)
+        return
+    frames = _frames(directory, total)
+    first = next(frames)
+    options = dict(save_all=True, append_images=frames, duration=1000 / fps, loop=0)
+    if ext == ".gif":
+        first.save(out, format="GIF", optimize=False, **options)
+    else:
+        first.save(out, format="PNG", **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线导出整段删除动画（无需显示器）")
+    parser.add_argument("--out", required=True,
+                        help="输出：.gif、.png/.apng（动画 PNG）、.mp4（需要 ffmpeg），其它路径视为帧目录")
+    parser.add_argument("--size", type=sim_module._parse_size, default=(1920, 1080), help="分辨率，如 1920x1080")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--duration", type=float, default=300,
+                        help="进度从 0%% 到 100%% 的时长（秒，不含停顿），默认 300 即每 3 秒 1%%")
+    parser.add_argument("--easing", choices=sorted(sim_module.EASINGS), default="linear", help="进度曲线")
+    parser.add_argument("--stall", type=sim_module._parse_stall, action="append", default=[],
+                        metavar="PERCENT:SECONDS",
+                        help="到达 PERCENT 后停顿 SECONDS 秒，可重复")
+    parser.add_argument("--scenario", metavar="PATH", help="场景文件（.json 或 .toml），代替 --duration/--easing/--stall")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，同一种子导出结果完全相同")
+    parser.add_argument("--glyph-atlas", action="store_true", help="逐字形缓存并用 NumPy 拼行（需要 numpy）")
+    parser.add_argument("--glitch", action="store_true", help="错误行故障效果，随进度加强（需要 numpy）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="渲染进程数")
+    parser.add_argument("--chunk", type=int, default=120, help="每个任务渲染的连续帧数")
+    args = parser.parse_args(argv)
+    scenario = None
+    if args.scenario:
+        try:
+            scenario = sim_module.Scenario.load(args.scenario)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+
+    # 工作进程里不需要预渲染线程，渲染本身已经并行
+    options = dict(total_duration_seconds=args.duration, progress_easing=args.easing, progress_stalls=args.stall,
+                   name_prefetch=0, glyph_atlas=args.glyph_atlas, scenario=scenario, glitch=args.glitch)
+
+    ext = os.path.splitext(args.out)[1].lower()
+    if ext in (".gif", ".png", ".apng") and shutil.which("ffmpeg") is None:
+        total = frame_count(args.fps, args.seed, options)
+        if not pillow_fits(total, args.size):
+            parser.error(f"{total} frames at {args.size[0]}x{args.size[1]} are too many to assemble in memory "
+                         f"without ffmpeg; install ffmpeg, lower --fps/--size, or export a frame directory")
+    if ext in (".gif", ".png", ".apng", ".mp4"):
+        with tempfile.TemporaryDirectory(prefix="export_frames_") as directory:
+            total = render_frames(directory, args.size, args.fps, args.seed, options, args.workers, args.chunk)
+            assemble(directory, total, args.fps, args.out)
+    else:
+        os.makedirs(args.out, exist_ok=True)
+        total = render_frames(args.out, args.size, args.fps, args.seed, options, args.workers, args.chunk)
+        print(f"ffmpeg -framerate {args.fps:g} -i {os.path.join(args.out, 'frame_%06d.png')} "
+              f"-c:v libx264 -pix_fmt yuv420p out.mp4")
+    print(args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
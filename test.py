@@ -3,6 +3,7 @@ from tkinter import font as tkfont
 import random
 import os
 import time
+from collections import deque
 
 class FixedTransparentErrorSimulator:
     
@@ -33,7 +34,10 @@ class FixedTransparentErrorSimulator:
         # 文本滚动变量
         self.line_height = 20
         self.current_y = 0
-        self.text_items = []
+        # (text_id, y_pos)，y_pos 为内容坐标，屏幕坐标 = y_pos - scroll_offset
+        self.text_items = deque()
+        self._free_line_ids = []  # 滚出屏幕、等待复用的文本项
+        self.scroll_offset = 0
         self.screen_filled = False
 
         # 错误文本
@@ -201,33 +205,28 @@ class FixedTransparentErrorSimulator:
     # -------------------- 文本滚动 -------------------- #
     def add_line(self):
         new_line = self.get_next_line()
-        text_id = self.canvas.create_text(
-            10, self.current_y, text=new_line, fill="#fe1926",
-            font=("微软雅黑", 12, "bold"), anchor="nw"
-        )
-        self.canvas.tag_lower(text_id)  # 保证滚动文本在最底层
-        self.text_items.append((text_id, self.current_y, "#fe1926"))
+        if self._free_line_ids:
+            # 复用滚出顶部的文本项：只改文字和位置
+            text_id = self._free_line_ids.pop()
+            self.canvas.itemconfig(text_id, text=new_line)
+            self.canvas.coords(text_id, 10, self.current_y)
+        else:
+            text_id = self.canvas.create_text(
+                10, self.current_y, text=new_line, fill="#fe1926",
+                font=("微软雅黑", 12, "bold"), anchor="nw", tags=("error_line",)
+            )
+            self.canvas.tag_lower(text_id)  # 保证滚动文本在最底层
+        self.text_items.append((text_id, self.current_y + self.scroll_offset))
         self.current_y += self.line_height
         if not self.screen_filled and self.current_y >= self.screen_height:
             self.screen_filled = True
 
     def scroll_all_text_once(self):
-        new_items = []
-        for (text_id, y_pos, color) in self.text_items:
-            new_y = y_pos - self.line_height
-            self.canvas.coords(text_id, 10, new_y)
-            try:
-                self.canvas.itemconfig(text_id, fill=color)
-            except Exception:
-                pass
-            if new_y >= -self.line_height:
-                new_items.append((text_id, new_y, color))
-            else:
-                try:
-                    self.canvas.delete(text_id)
-                except Exception:
-                    pass
-        self.text_items = new_items
+        """整列一次 canvas.move，滚出顶部的文本项交给 add_line 复用"""
+        self.canvas.move("error_line", 0, -self.line_height)
+        self.scroll_offset += self.line_height
+        while self.text_items and self.text_items[0][1] - self.scroll_offset < -self.line_height:
+            self._free_line_ids.append(self.text_items.popleft()[0])
         self.current_y -= self.line_height
         self.add_line()
 
@@ -350,6 +349,9 @@ class FixedTransparentErrorSimulator:
             # 没有内容则不做任何调度
             return
 
+        # 上一批的 4 个 after 在此刻都已触发，只保留本批的 id，列表不会无限增长
+        self._name_after_ids = []
+
         # 生成三个在 [0,1000) 的随机毫秒偏移并排序
         offsets = sorted([random.randint(0, 999) for _ in range(3)])
         base_delay = 0  # 立即开始周期，offsets 相对现在
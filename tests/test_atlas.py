@@ -0,0 +1,91 @@
+"""磁盘行图集：跨实例复用已写入的行图，取键时不再访问字体文件。"""
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+@unittest.skipUnless(importlib.util.find_spec("PIL"), "Pillow is not installed")
+class RasterAtlasTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        font_path = os.path.join(self.dir, "face.ttf")
+        with open(font_path, "wb") as f:
+            f.write(b"not really a font")
+        self.font = types.SimpleNamespace(path=font_path, index=0, size=16)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def atlas(self):
+        return sim_module.RasterAtlas(os.path.join(self.dir, "atlas"))
+
+    def test_round_trip_across_instances(self):
+        from PIL import Image
+        img = Image.new("RGBA", (7, 3), (10, 20, 30, 255))
+        atlas = self.atlas()
+        key = atlas.key("hello", self.font, 16, (255, 255, 255, 255))
+        atlas.put(key, img, "error")
+        atlas.close()
+        reopened = self.atlas()
+        try:
+            self.assertIn(key, reopened)
+            self.assertEqual(reopened.get(key).tobytes(), img.tobytes())
+        finally:
+            reopened.close()
+
+    def test_key_does_not_stat_the_font_file(self):
+        atlas = self.atlas()
+        try:
+            atlas.register_font(self.font)
+            with mock.patch.object(sim_module.os, "stat", side_effect=AssertionError("stat on key")):
+                keys = {atlas.key(f"line {i}", self.font, 16, (255, 255, 255, 255)) for i in range(100)}
+            self.assertEqual(len(keys), 100)
+        finally:
+            atlas.close()
+
+    def test_changed_font_gives_new_keys_after_register(self):
+        atlas = self.atlas()
+        try:
+            before = atlas.key("x", self.font, 16, (255, 255, 255, 255))
+            with open(self.font.path, "ab") as f:
+                f.write(b"!")
+            self.assertEqual(atlas.key("x", self.font, 16, (255, 255, 255, 255)), before)
+            atlas.register_font(self.font)
+            self.assertNotEqual(atlas.key("x", self.font, 16, (255, 255, 255, 255)), before)
+        finally:
+            atlas.close()
+
+    def test_source_change_drops_its_entries(self):
+        from PIL import Image
+        atlas = self.atlas()
+        try:
+            atlas.set_source("name", "v1")
+            key = atlas.key("n", self.font, 16, (255, 255, 255, 255))
+            atlas.put(key, Image.new("RGBA", (1, 1)), "name")
+            atlas.set_source("name", "v1")
+            self.assertIn(key, atlas)
+            atlas.set_source("name", "v2")
+            self.assertNotIn(key, atlas)
+        finally:
+            atlas.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
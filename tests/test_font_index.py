@@ -0,0 +1,158 @@
+"""系统字体索引：只读表目录和 cmap/name 表、TTC 逐面解析、后台扫描不阻塞构造。"""
+import importlib
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+def cmap_format12(ranges):
+    groups = b"".join(struct.pack(">III", start, end, 0) for start, end in ranges)
+    sub = struct.pack(">HHIII", 12, 0, 16 + len(groups), 0, len(ranges)) + groups
+    return struct.pack(">HHHHI", 0, 1, 3, 10, 12) + sub
+
+
+def cmap_format4(ranges):
+    ranges = list(ranges) + [(0xFFFF, 0xFFFF)]
+    seg = len(ranges)
+    body = struct.pack(f">{seg}H", *(e for _, e in ranges)) + b"\0\0" + struct.pack(f">{seg}H", *(s for s, _ in ranges))
+    sub = struct.pack(">7H", 4, 14 + len(body), 0, seg * 2, 0, 0, 0) + body
+    return struct.pack(">HHHHI", 0, 1, 3, 1, 12) + sub
+
+
+def name_table(family, style):
+    strings = [family.encode("utf-16-be"), style.encode("utf-16-be")]
+    records, pos = b"", 0
+    for name_id, raw in zip((1, 2), strings):
+        records += struct.pack(">6H", 3, 1, 0x409, name_id, len(raw), pos)
+        pos += len(raw)
+    return struct.pack(">HHH", 0, 2, 6 + len(records)) + records + b"".join(strings)
+
+
+def font_bytes(cmap, name, faces=1, padding=0):
+    """faces > 1 时生成 TTC，各个面共用同一张 cmap / name 表；padding 模拟体积很大的字形数据"""
+    header = b"ttcf" + struct.pack(">II", 0x10000, faces) if faces > 1 else b""
+    dir_size = 12 + 2 * 16
+    dirs_at = len(header) + faces * 4 * (faces > 1)
+    cmap_at = dirs_at + faces * dir_size
+    name_at = cmap_at + len(cmap)
+    if faces > 1:
+        header += struct.pack(f">{faces}I", *(dirs_at + i * dir_size for i in range(faces)))
+    directory = struct.pack(">IHHHH", 0x10000, 2, 0, 0, 0) + \
+        struct.pack(">4sIII", b"cmap", 0, cmap_at, len(cmap)) + struct.pack(">4sIII", b"name", 0, name_at, len(name))
+    return header + directory * faces + cmap + name + b"\0" * padding
+
+
+class FontIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+
+class ScanFontFileTest(FontIndexTestCase):
+    def test_format12_and_name(self):
+        path = self.write("cjk.ttf", font_bytes(cmap_format12([(0x20, 0x7E), (0x4E00, 0x9FFF)]),
+                                                name_table("Test Sans", "Regular")))
+        face, = sim_module._scan_font_file(path)
+        self.assertEqual((face["index"], face["family"], face["style"]), (0, "Test Sans", "Regular"))
+        self.assertEqual(face["ranges"], [0x20, 0x7E, 0x4E00, 0x9FFF])
+
+    def test_format4_drops_the_sentinel(self):
+        path = self.write("bmp.ttf", font_bytes(cmap_format4([(0x41, 0x5A), (0x2588, 0x2588)]),
+                                                name_table("Blocks", "Bold")))
+        face, = sim_module._scan_font_file(path)
+        self.assertEqual(face["ranges"], [0x41, 0x5A, 0x2588, 0x2588])
+
+    def test_ttc_faces(self):
+        path = self.write("pair.ttc", font_bytes(cmap_format12([(0x30, 0x39)]), name_table("Pair", "Book"),
+                                                 faces=2))
+        faces = sim_module._scan_font_file(path)
+        self.assertEqual([f["index"] for f in faces], [0, 1])
+        self.assertTrue(all(f["family"] == "Pair" for f in faces))
+
+    def test_truncated_file_raises_struct_error(self):
+        data = font_bytes(cmap_format12([(0x30, 0x39)]), name_table("Cut", "Regular"))
+        path = self.write("cut.ttf", data[:40])
+        with self.assertRaises(struct.error):
+            sim_module._scan_font_file(path)
+
+    def test_reads_only_the_needed_tables(self):
+        path = self.write("big.ttf", font_bytes(cmap_format12([(0x30, 0x39)]), name_table("Big", "Regular"),
+                                                padding=4 << 20))
+        counted = []
+        real_open = open
+
+        class CountingFile:
+            def __init__(self, f):
+                self.f = f
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.f.close()
+
+            def seek(self, offset):
+                return self.f.seek(offset)
+
+            def read(self, size=-1):
+                data = self.f.read(size)
+                counted.append(len(data))
+                return data
+
+        sim_module.open = lambda *a, **k: CountingFile(real_open(*a, **k))
+        try:
+            sim_module._scan_font_file(path)
+        finally:
+            del sim_module.open
+        self.assertLess(sum(counted), 4096)
+
+
+class FontIndexTest(FontIndexTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fonts = os.path.join(self.dir, "fonts")
+        os.mkdir(self.fonts)
+        with open(os.path.join(self.fonts, "latin.ttf"), "wb") as f:
+            f.write(font_bytes(cmap_format12([(0x20, 0x7E)]), name_table("Latin", "Regular")))
+        with open(os.path.join(self.fonts, "cjk.ttf"), "wb") as f:
+            f.write(font_bytes(cmap_format12([(0x20, 0x7E), (0x4E00, 0x9FFF)]), name_table("Han", "Regular")))
+        self.index_path = os.path.join(self.dir, "index.json")
+
+    def test_background_scan_fills_and_saves_the_index(self):
+        index = sim_module.FontIndex(self.index_path, dirs=[self.fonts], background=True)
+        self.assertTrue(index.ready.wait(10))
+        path, face, family = index.best("数据删除进度")
+        self.assertEqual((os.path.basename(path), face, family), ("cjk.ttf", 0, "Han"))
+        with open(self.index_path, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["files"]), 2)
+        again = sim_module.FontIndex(self.index_path, dirs=[self.fonts], background=True)
+        self.assertTrue(again.ready.is_set())  # 目录没变：直接读索引，不再扫描
+        self.assertEqual(again.scanned, 0)
+        self.assertEqual(again.best("数据")[2], "Han")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""离屏渲染的回归检查：同一 seed 逐字节可复现、不同 seed 不同、过小分辨率给出明确错误。"""
+import hashlib
+import importlib
+import importlib.util
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZE = (640, 360)
+TIMES = (0.5, 12.0, 95.0, 320.0)
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    # error.txt / name.txt 按相对路径读取
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+def render(seed, times=TIMES, size=SIZE):
+    sim = sim_module.HeadlessErrorSimulator(*size, seed=seed, name_prefetch=0)
+    try:
+        return [sim.render_frame(t).tobytes() for t in times]
+    finally:
+        sim.shutdown()
+
+
+@unittest.skipUnless(importlib.util.find_spec("PIL"), "Pillow is not installed")
+class HeadlessFrameTest(unittest.TestCase):
+    def test_same_seed_gives_identical_frames(self):
+        self.assertEqual(render(7), render(7))
+
+    def test_different_seed_changes_frames(self):
+        self.assertNotEqual(render(7, times=(12.0,)), render(8, times=(12.0,)))
+
+    def test_frames_match_across_processes(self):
+        # 另起一个进程并换一个字符串哈希种子：结果不能依赖 id() 或 hash() 的取值
+        code = ("import hashlib, importlib, sys; sys.path.insert(0, '.'); "
+                "m = importlib.import_module('Pillow的方法'); "
+                f"s = m.HeadlessErrorSimulator({SIZE[0]}, {SIZE[1]}, seed=7, name_prefetch=0); "
+                "print(hashlib.sha1(s.render_frame(95.0).tobytes()).hexdigest())")
+        env = dict(os.environ, PYTHONHASHSEED="12345")
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                             check=True).stdout.strip()
+        self.assertEqual(out, hashlib.sha1(render(7, times=(95.0,))[0]).hexdigest())
+
+    def test_frame_shape_and_progress(self):
+        sim = sim_module.HeadlessErrorSimulator(*SIZE, seed=0, name_prefetch=0)
+        try:
+            frame = sim.render_frame(150.0)
+            self.assertEqual(frame.size, SIZE)
+            self.assertEqual(frame.mode, "RGBA")
+            self.assertEqual(sim.progress_percent, 50)
+            sim.render_frame(sim.progress_clock.total_seconds)
+            self.assertEqual(sim.progress_percent, 100)
+        finally:
+            sim.shutdown()
+
+    def test_minimum_size_renders_and_smaller_is_rejected(self):
+        render(0, times=(320.0,), size=sim_module.HeadlessErrorSimulator.MIN_SIZE)
+        with self.assertRaises(ValueError):
+            sim_module.HeadlessErrorSimulator(160, 90, seed=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""大文件行源：按行偏移读取的结果与 readlines() 一致，文件被改写或截短时不崩溃。"""
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+class LineSourceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sources = []
+
+    def tearDown(self):
+        for source in self.sources:
+            source.close()
+        shutil.rmtree(self.dir)
+
+    def write(self, data, name="lines.txt", mode="wb"):
+        path = os.path.join(self.dir, name)
+        with open(path, mode) as f:
+            f.write(data)
+        return path
+
+    def open(self, path, **kwargs):
+        source = sim_module.LineSource(path, **kwargs)
+        self.sources.append(source)
+        return source
+
+    @staticmethod
+    def expected(path):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return [line.rstrip("\n\r") for line in f.readlines()]
+
+
+class LineSourceTest(LineSourceTestCase):
+    def test_matches_readlines(self):
+        for data in (b"", b"one", b"one\n", b"one\ntwo", b"\n\n", b"a\r\nb\r\n\nc\n", "错误\n行".encode()):
+            with self.subTest(data=data):
+                path = self.write(data)
+                source = self.open(path)
+                self.assertEqual(list(source), self.expected(path))
+                self.assertEqual(len(source), len(self.expected(path)))
+
+    def test_indexing(self):
+        source = self.open(self.write(b"a\nb\nc\n"))
+        self.assertEqual(source[0], "a")
+        self.assertEqual(source[-1], "c")
+        with self.assertRaises(IndexError):
+            source[3]
+
+    def test_lines_longer_than_a_chunk(self):
+        path = self.write(b"x" * 100 + b"\n" + b"y" * 50 + b"\nz")
+        small = type("SmallChunkSource", (sim_module.LineSource,), {"CHUNK": 7})
+        source = small(path)
+        self.sources.append(source)
+        self.assertEqual(list(source), ["x" * 100, "y" * 50, "z"])
+
+    def test_truncated_file_reads_short_instead_of_crashing(self):
+        path = self.write(b"first line\nsecond line\nthird line\n")
+        source = self.open(path)
+        self.write(b"fir")  # 原地截短，旧偏移已经越过文件末尾
+        self.assertEqual(source[0], "fir")
+        self.assertEqual(source[1], "")
+        self.assertEqual(source[2], "")
+
+    def test_persisted_index_is_reused(self):
+        path = self.write(b"a\nb\nc\n")
+        first = self.open(path, persist_index=True)
+        self.assertTrue(os.path.exists(path + ".idx"))
+        second = self.open(path, persist_index=True)
+        self.assertEqual(list(second.offsets), list(first.offsets))
+        self.assertIsNone(second.digest)  # 索引来自 .idx，没有重新读文件
+        self.assertEqual(list(second), ["a", "b", "c"])
+
+
+class BackgroundIndexTest(LineSourceTestCase):
+    def small_source(self, path, **kwargs):
+        small = type("SmallChunkSource", (sim_module.LineSource,), {"CHUNK": 64, "FIRST_CHUNK": 100})
+        source = small(path, background=True, **kwargs)
+        self.sources.append(source)
+        return source
+
+    def test_first_lines_are_served_before_indexing_finishes(self):
+        path = self.write("".join(f"line {i}\n" for i in range(2000)).encode())
+        gate = sim_module.threading.Event()
+        small = type("GatedSource", (sim_module.LineSource,), {"CHUNK": 64, "FIRST_CHUNK": 100})
+        read = small._read
+        # 后台线程读到第一块之后停住，直到测试放行
+        small._read = lambda self, start, end: (start < 100 or gate.wait()) and read(self, start, end)
+        source = small(path, background=True)
+        self.sources.append(source)
+        self.assertFalse(source.indexed.is_set())
+        self.assertGreater(len(source), 5)
+        self.assertLess(len(source), 2000)
+        self.assertEqual(source[0], "line 0")
+        self.assertEqual(source[len(source) - 1], f"line {len(source) - 1}")
+        gate.set()
+        self.assertTrue(source.indexed.wait(10))
+        self.assertEqual(list(source), self.expected(path))
+
+    def test_result_and_digest_match_a_synchronous_scan(self):
+        path = self.write(b"".join(b"x" * (i % 37) + b"\n" for i in range(500)) + b"tail")
+        source = self.small_source(path)
+        self.assertTrue(source.indexed.wait(10))
+        sync = self.open(path)
+        self.assertEqual(list(source.offsets), list(sync.offsets))
+        self.assertEqual(source.digest, sync.digest)
+        self.assertEqual(list(source), self.expected(path))
+
+    def test_persists_index_once_finished(self):
+        path = self.write(b"abc\n" * 1000)
+        source = self.small_source(path, persist_index=True)
+        source.indexed.wait(10)
+        source._indexer.join()
+        self.assertTrue(os.path.exists(path + ".idx"))
+
+    def test_close_while_indexing(self):
+        path = self.write(b"abc\n" * 100000)
+        source = self.small_source(path)
+        source.close()
+        self.sources.remove(source)
+        self.assertFalse(source._indexer.is_alive())
+
+
+class LineSourceReloadTest(LineSourceTestCase):
+    def test_append_reuses_the_old_index(self):
+        path = self.write(b"a\nb\npartial")
+        base = self.open(path)
+        self.write(b" line\nc\n", mode="ab")
+        source = self.open(path, base=base)
+        self.assertEqual(list(source), ["a", "b", "partial line", "c"])
+        self.assertEqual(list(source.offsets[:2]), list(base.offsets[:2]))
+        with open(path, "rb") as f:
+            self.assertEqual(source.digest, sim_module.hashlib.sha1(f.read()).digest())
+
+    def test_edit_before_the_end_forces_a_full_rescan(self):
+        path = self.write(b"aaaa\nbbbb\n")
+        base = self.open(path)
+        # 原地把一行拆成两行、长度不变，再在末尾追加：旧偏移不能再用
+        self.write(b"aa\na\nbbbb\ncc\n")
+        source = self.open(path, base=base)
+        self.assertEqual(list(source), self.expected(path))
+
+    def test_base_without_digest_forces_a_full_rescan(self):
+        path = self.write(b"a\nb\n")
+        self.open(path, persist_index=True)
+        base = self.open(path, persist_index=True)
+        self.write(b"c\n", mode="ab")
+        source = self.open(path, base=base)
+        self.assertEqual(list(source), ["a", "b", "c"])
+        self.assertIsNotNone(source.digest)
+
+    def test_watcher_queues_a_new_source_on_change(self):
+        path = self.write(b"a\n")
+        watcher = sim_module.CorpusWatcher([path])
+        base = self.open(path)
+        watcher.track(path, base)
+        watcher.poll_once()
+        self.assertFalse(watcher.ready)
+        self.write(b"b\n", mode="ab")
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+        watcher.poll_once()
+        (changed, source), = watcher.ready
+        self.sources.append(source)
+        self.assertEqual(changed, path)
+        self.assertEqual(list(source), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""name 行预渲染：取不到时整队作废并从当前位置重新提交，name.txt 热更新后仍然命中。"""
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+class RasterPrefetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.prefetcher = sim_module.RasterPrefetcher(str.upper, depth=3, workers=1)
+
+    def tearDown(self):
+        self.prefetcher.shutdown()
+
+    def test_hit_pops_up_to_the_match(self):
+        for i, text in enumerate("abc"):
+            self.prefetcher.submit(i, text)
+        self.assertEqual(self.prefetcher.take(1, "b"), "B")
+        self.assertEqual(self.prefetcher.hits, 1)
+        self.assertTrue(self.prefetcher.has_room())
+        self.assertEqual(self.prefetcher.take(2, "c"), "C")
+
+    def test_miss_drops_the_stale_queue(self):
+        gate = threading.Event()
+        blocked = sim_module.RasterPrefetcher(lambda text: gate.wait() and text, depth=3, workers=1)
+        try:
+            for i, text in enumerate("abc"):
+                blocked.submit(i, text)
+            futures = [future for _, _, future in blocked._queue]
+            self.assertFalse(blocked.has_room())
+            self.assertIsNone(blocked.take(0, "changed"))
+            self.assertEqual(blocked.misses, 1)
+            self.assertEqual(len(blocked._queue), 0)
+            # 还没开始执行的预渲染被取消
+            self.assertTrue(all(f.cancelled() for f in futures[1:]))
+        finally:
+            gate.set()
+            blocked.shutdown()
+
+
+@unittest.skipUnless(importlib.util.find_spec("PIL"), "Pillow is not installed")
+class NameReloadPrefetchTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.write("error.txt", (f"error {i}" for i in range(50)))
+        self.write("name.txt", (f"line {i}" for i in range(500)))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    @staticmethod
+    def write(path, lines):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def test_prefetch_keeps_hitting_after_name_txt_changes(self):
+        sim = sim_module.HeadlessErrorSimulator(640, 360, seed=1, name_prefetch=4, hot_reload=True,
+                                                raster_cache_size=0)
+        try:
+            prefetcher = sim.name_prefetcher
+            sim.render_frame(10.0)
+            self.assertGreater(prefetcher.hits, 20)
+            self.write("name.txt", (f"renamed {i}" for i in range(500)))
+            os.utime("name.txt", ns=(0, os.stat("name.txt").st_mtime_ns + 10 ** 9))
+            sim.corpus_watcher.poll_once()
+            hits, misses = prefetcher.hits, prefetcher.misses
+            sim.render_frame(30.0)
+            self.assertEqual(sim.name_lines[0], "renamed 0")
+            # 换文件后只有第一次显示取不到，之后照常命中
+            self.assertLessEqual(prefetcher.misses - misses, 2)
+            self.assertGreater(prefetcher.hits - hits, 50)
+        finally:
+            sim.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
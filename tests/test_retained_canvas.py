@@ -0,0 +1,127 @@
+"""保留模式场景层：只把真正变化的属性、坐标和叠放顺序发给 Tk，也不拖住已换掉的图片。"""
+import gc
+import importlib
+import itertools
+import os
+import sys
+import unittest
+import weakref
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+class FakeCanvas:
+    """记录发出的每条命令"""
+
+    def __init__(self):
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return next(self._ids) if name.startswith("create_") else None
+        return command
+
+    def take(self):
+        calls, self.calls = self.calls, []
+        return calls
+
+
+class FakeRoot:
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for callback in idle:
+            callback()
+
+
+class Photo:
+    """代替 PhotoImage，只用来观察引用是否被释放"""
+
+
+class RetainedCanvasTest(unittest.TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas()
+        self.root = FakeRoot()
+        self.scene = sim_module.RetainedCanvas(self.canvas, self.root)
+
+    def test_unchanged_values_are_not_sent(self):
+        item = self.scene.create("text", 10, 20, text="0%", fill="#ffffff")
+        self.canvas.take()
+        self.scene.itemconfig(item, text="0%", fill="#ffffff")
+        self.scene.coords(item, 10, 20)
+        self.assertEqual(self.root.idle, [])
+        self.assertEqual(self.scene.suppressed, 3)
+
+    def test_changes_are_coalesced_into_one_flush(self):
+        item = self.scene.create("text", 10, 20, text="0%")
+        self.canvas.take()
+        for percent in range(1, 6):
+            self.scene.itemconfig(item, text=f"{percent}%")
+        self.scene.coords(item, 11, 20)
+        self.assertEqual(len(self.root.idle), 1)
+        self.root.run_idle()
+        self.assertEqual(self.canvas.take(), [("coords", (item, 11, 20), {}),
+                                              ("itemconfig", (item,), {"text": "5%"})])
+
+    def test_value_changed_and_back_before_flush_is_dropped(self):
+        item = self.scene.create("text", 0, 0, text="a")
+        self.canvas.take()
+        self.scene.itemconfig(item, text="b")
+        self.scene.itemconfig(item, text="a")
+        self.root.run_idle()
+        self.assertEqual(self.canvas.take(), [])
+
+    def test_restack_only_raises_items_out_of_order(self):
+        a = self.scene.create("rectangle", 0, 0, 1, 1)
+        b = self.scene.create("rectangle", 0, 0, 1, 1)
+        c = self.scene.create("rectangle", 0, 0, 1, 1)
+        self.scene.set_top_order((b, c))
+        self.root.run_idle()
+        self.canvas.take()
+        self.scene.set_top_order((b, c))
+        self.root.run_idle()
+        self.assertEqual(self.canvas.take(), [])  # 顺序没变，不发命令
+        self.scene.set_top_order((c, b))
+        self.root.run_idle()
+        self.assertEqual(self.canvas.take(), [("tag_raise", (b,), {})])
+        self.scene.set_top_order((c, b, a))
+        self.root.run_idle()
+        self.assertEqual(self.canvas.take(), [("tag_raise", (a,), {})])  # c, b 已经按顺序在 a 之上
+
+    def test_deleted_items_are_forgotten(self):
+        item = self.scene.create("text", 0, 0, text="x")
+        self.scene.itemconfig(item, text="y")
+        self.scene.delete(item)
+        self.canvas.take()
+        self.root.run_idle()
+        self.assertEqual(self.canvas.take(), [])
+        self.assertNotIn(item, self.scene._sent)
+
+    def test_create_does_not_pin_the_image(self):
+        photo = Photo()
+        ref = weakref.ref(photo)
+        self.scene.create("image", 0, 0, image=photo, anchor="nw")
+        self.canvas.take()
+        del photo
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""声明式场景：构造时逐项校验、按扩展名加载、同一种子编译结果一致、进度查询。"""
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, "scenario_example.json")
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+def scenario(*phases, **top):
+    return sim_module.Scenario({"phases": list(phases) or [{"to": 100, "seconds": 10}], **top}, name="t")
+
+
+class ScenarioValidationTest(unittest.TestCase):
+    def test_defaults_carry_forward_but_hold_does_not(self):
+        s = scenario({"to": 50, "seconds": 5, "hold": 2, "scroll_ms": [100, 200]}, {"to": 100})
+        first, second = s.phases
+        self.assertEqual((first["hold"], second["hold"]), (2.0, 0.0))
+        self.assertEqual(second["scroll_ms"], (100, 200))
+        self.assertEqual(second["seconds"], 5.0)
+        self.assertEqual(s.end["error_color"], 0xfe1926)
+
+    def test_rejects_malformed_values(self):
+        cases = {
+            "top level": [],
+            "seed": {"seed": "1", "phases": [{"to": 100}]},
+            "bool seed": {"seed": True, "phases": [{"to": 100}]},
+            "no phases": {"phases": []},
+            "phase type": {"phases": [100]},
+            "unknown key": {"phases": [{"to": 100, "speed": 2}]},
+            "to backwards": {"phases": [{"to": 50}, {"to": 40}, {"to": 100}]},
+            "to float": {"phases": [{"to": 100.0}]},
+            "not 100": {"phases": [{"to": 90}]},
+            "easing": {"phases": [{"to": 100, "easing": "bounce"}]},
+            "negative seconds": {"phases": [{"to": 100, "seconds": -1}]},
+            "string hold": {"phases": [{"to": 100, "hold": "2"}]},
+            "scroll order": {"phases": [{"to": 100, "scroll_ms": [900, 300]}]},
+            "scroll zero": {"phases": [{"to": 100, "scroll_ms": [0, 10]}]},
+            "names": {"phases": [{"to": 100, "names_per_second": 1001}]},
+            "color": {"phases": [{"to": 100, "error_color": "#12345g"}]},
+            "short color": {"phases": [{"to": 100, "error_color": "#fff"}]},
+            "end type": {"phases": [{"to": 100}], "end": []},
+            "end key": {"phases": [{"to": 100}], "end": {"to": 100}},
+            "end color": {"phases": [{"to": 100}], "end": {"percent_color": "red"}},
+            "loop": {"phases": [{"to": 100}], "end": {"loop_seconds": -5}},
+        }
+        for label, data in cases.items():
+            with self.subTest(label), self.assertRaises(ValueError):
+                sim_module.Scenario(data, name="t")
+
+    def test_error_names_the_phase(self):
+        with self.assertRaisesRegex(ValueError, r"t: phases\[1\]"):
+            scenario({"to": 50}, {"to": 100, "easing": "bounce"})
+
+
+class ScenarioLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_example_loads(self):
+        s = sim_module.Scenario.load(EXAMPLE)
+        self.assertEqual([p["to"] for p in s.phases], [30, 31, 60, 99, 100])
+        self.assertIsNone(s.phases[4]["scroll_ms"])
+        self.assertEqual(s.end["loop_seconds"], 60.0)
+
+    def test_bad_json_is_a_value_error_with_the_path(self):
+        path = os.path.join(self.dir, "bad.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{\"phases\": [")
+        with self.assertRaisesRegex(ValueError, "bad.json"):
+            sim_module.Scenario.load(path)
+
+    def test_toml(self):
+        try:
+            import tomllib  # noqa: F401
+        except ImportError:
+            self.skipTest("tomllib needs Python 3.11+")
+        path = os.path.join(self.dir, "s.toml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("seed = 3\n[[phases]]\nto = 100\nseconds = 4\n")
+        s = sim_module.Scenario.load(path)
+        self.assertEqual((s.seed, s.phases[0]["seconds"]), (3, 4.0))
+
+
+class CompiledScenarioTest(unittest.TestCase):
+    def setUp(self):
+        self.scenario = sim_module.Scenario.load(EXAMPLE)
+
+    def compiled(self, seed=7):
+        return self.scenario.compile(seed)
+
+    def test_same_seed_same_events(self):
+        a, b = self.compiled(), self.compiled()
+        self.assertEqual((a.times, a.kinds, a.values), (b.times, b.kinds, b.values))
+        self.assertNotEqual(self.compiled(8).times, a.times)
+
+    def test_scenario_seed_wins(self):
+        with open(EXAMPLE, encoding="utf-8") as f:
+            data = dict(json.load(f), seed=11)
+        seeded = sim_module.Scenario(data)
+        self.assertEqual(seeded.compile(1).times, seeded.compile(2).times)
+        self.assertEqual(seeded.compile().seed, 11)
+
+    def test_events_are_sorted_and_loop_tail_follows_end(self):
+        c = self.compiled()
+        self.assertEqual(list(c.times[:c.loop_from]), sorted(c.times[:c.loop_from]))
+        self.assertEqual(c.kinds[c.loop_from - 1], c.END)
+        self.assertEqual(c.loop_seconds, 60.0)
+        self.assertTrue(all(c.end_at <= t < c.end_at + 60 for t in c.times[c.loop_from:]))
+
+    def test_progress_queries(self):
+        c = self.compiled()
+        # 90s 缓出到 30%，3s 到 31% 后停 12s，4s 到 60%，150s 到 99%，再跳到 100% 停 5s
+        self.assertAlmostEqual(c.total_seconds, 264.0)
+        self.assertEqual(c.percent_at(0), 0)
+        self.assertEqual(c.percent_at(100.0), 31)
+        self.assertEqual(c.percent_at(105.0), 31)
+        self.assertEqual(c.percent_at(259.0), 100)
+        self.assertAlmostEqual(c.next_change_at(100.0), 105.0 + 4 / 29 ** 0.5, places=6)
+        self.assertIsNone(c.next_change_at(300.0))
+
+    def test_no_scroll_while_scroll_ms_is_null(self):
+        c = self.compiled()
+        scrolls = [t for t, k in zip(c.times, c.kinds) if k == c.SCROLL]
+        self.assertFalse(any(259.0 < t < 264.0 for t in scrolls))
+
+    def test_describe(self):
+        text = self.compiled().describe()
+        self.assertIn("end state at 264.00s", text)
+        self.assertIn("phase 1:    90.00s -   105.00s   30% ->  31%", text)
+        self.assertIn("repeating every 60s", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
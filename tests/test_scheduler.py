@@ -0,0 +1,162 @@
+"""统一定时器：按截止时间顺序触发、惰性取消、回调出错时其它回调照常触发且定时器不停摆。"""
+import importlib
+import importlib.util
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRoot:
+    """只实现调度器用到的 after / after_cancel / report_callback_exception"""
+
+    def __init__(self):
+        self.pending = {}
+        self.reported = []
+        self._next = 0
+
+    def after(self, delay, callback):
+        self._next += 1
+        after_id = f"after#{self._next}"
+        self.pending[after_id] = (delay, callback)
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        self.reported.append(exc)
+
+    def fire(self):
+        after_id, (_, callback) = self.pending.popitem()
+        callback()
+
+
+class DeadlineSchedulerTest(unittest.TestCase):
+    def test_fires_in_deadline_order(self):
+        clock = FakeClock()
+        sched = sim_module.DeadlineScheduler(clock=clock)
+        fired = []
+        for deadline in (3.0, 1.0, 2.0, 1.0):
+            sched.call_at(deadline, fired.append, deadline)
+        clock.now = 2.5
+        self.assertEqual(sched.run_due(), 3)
+        self.assertEqual(fired, [1.0, 1.0, 2.0])
+        self.assertEqual(sched.next_deadline(), 3.0)
+
+    def test_cancelled_entries_do_not_fire(self):
+        sched = sim_module.DeadlineScheduler(clock=FakeClock())
+        fired = []
+        keep = sched.call_at(1.0, fired.append, "keep")
+        drop = sched.call_at(0.5, fired.append, "drop")
+        sched.cancel(drop)
+        self.assertEqual(len(sched), 1)
+        sched.run_due(1.0)
+        self.assertEqual(fired, ["keep"])
+        sched.cancel(keep)  # 已触发的句柄再取消是空操作
+        self.assertEqual(len(sched), 0)
+
+    def test_callbacks_added_during_a_round_wait_for_the_next(self):
+        sched = sim_module.DeadlineScheduler(clock=FakeClock())
+        fired = []
+
+        def reschedule():
+            fired.append("first")
+            sched.call_at(0.0, fired.append, "second")
+
+        sched.call_at(0.0, reschedule)
+        self.assertEqual(sched.run_due(0.0), 1)
+        self.assertEqual(sched.run_due(0.0), 1)
+        self.assertEqual(fired, ["first", "second"])
+
+    def test_error_without_root_runs_the_rest_then_raises(self):
+        sched = sim_module.DeadlineScheduler(clock=FakeClock())
+        fired = []
+
+        def boom():
+            raise OSError("disk full")
+
+        sched.call_at(1.0, fired.append, "before")
+        sched.call_at(2.0, boom)
+        sched.call_at(3.0, fired.append, "after")
+        with self.assertRaises(OSError):
+            sched.run_due(5.0)
+        self.assertEqual(fired, ["before", "after"])
+        self.assertEqual(sched.errors, 1)
+        self.assertIsNone(sched.current_deadline)
+
+    def test_error_with_root_is_reported_and_timer_rearms(self):
+        clock = FakeClock()
+        root = FakeRoot()
+        sched = sim_module.DeadlineScheduler(root, clock=clock)
+        fired = []
+
+        def boom():
+            raise RuntimeError("TclError stand-in")
+
+        sched.call_at(1.0, boom)
+        sched.call_at(1.0, fired.append, "sibling")
+        sched.call_at(2.0, fired.append, "later")
+        clock.now = 1.0
+        root.fire()
+        self.assertEqual(fired, ["sibling"])
+        self.assertEqual([str(e) for e in root.reported], ["TclError stand-in"])
+        # 出错之后仍然挂着下一次 after，对准 2.0
+        self.assertEqual(len(root.pending), 1)
+        self.assertEqual(next(iter(root.pending.values()))[0], 1000)
+        clock.now = 2.0
+        root.fire()
+        self.assertEqual(fired, ["sibling", "later"])
+
+    def test_after_delay_follows_time_scale(self):
+        clock = FakeClock()
+        root = FakeRoot()
+        sched = sim_module.DeadlineScheduler(root, clock=clock, time_scale=4.0)
+        sched.call_at(1.0, lambda: None)
+        self.assertEqual(next(iter(root.pending.values()))[0], 250)
+
+
+@unittest.skipUnless(importlib.util.find_spec("PIL"), "Pillow is not installed")
+class CatchUpTest(unittest.TestCase):
+    def test_stall_does_not_burst_scroll_and_name_ticks(self):
+        sim = sim_module.HeadlessErrorSimulator(640, 360, seed=1, name_prefetch=0)
+        try:
+            sim.render_frame(5.0)
+            ticks = []
+            sim._scroll_tick = lambda: ticks.append(sim.scheduler.clock())
+            batches = []
+            schedule = sim._schedule_next_triplet
+            sim._schedule_next_triplet = lambda: (batches.append(1), schedule())
+            # 模拟挂起 60 秒：时钟直接跳过去，再把到期的事件一轮一轮跑完
+            sim.virtual_time = 65.0
+            while sim.scheduler.run_due(65.0):
+                pass
+            # 不做平移的话要补发约 100 次滚动、60 批 name
+            self.assertLessEqual(len(ticks), 3)
+            self.assertLessEqual(len(batches), 2)
+            self.assertGreater(sim._next_scroll_at, 65.0 - sim.CATCH_UP_SLACK)
+        finally:
+            sim.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
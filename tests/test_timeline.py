@@ -0,0 +1,131 @@
+"""时间线录制 / 回放：二进制格式往返、与渲染耗时无关、回放得到同样的画面。"""
+import argparse
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sim_module = None
+
+
+def setUpModule():
+    global sim_module
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    sim_module = importlib.import_module("Pillow的方法")
+
+
+class TimelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+
+class TimelineFormatTest(TimelineTestCase):
+    def test_round_trip(self):
+        Timeline = sim_module.Timeline
+        recorder = sim_module.TimelineRecorder(self.path("t.bin"), seed=42, duration=12.5)
+        recorder.record(Timeline.SCROLL_DELAY, 0, 512)
+        recorder.record(Timeline.NAME_LINE, 250, 7)
+        recorder.record(Timeline.SCROLL_DELAY, 512, 300)
+        recorder.close()
+        player = sim_module.TimelinePlayer(self.path("t.bin"))
+        self.assertEqual((player.seed, player.duration, player.count), (42, 12.5, 3))
+        # 按类型各自排队，类型之间互不影响
+        self.assertEqual(player.take(Timeline.NAME_LINE, 250, -1), 7)
+        self.assertEqual(player.take(Timeline.SCROLL_DELAY, 0, -1), 512)
+        self.assertEqual(player.take(Timeline.SCROLL_DELAY, 999, -1), 300)
+        self.assertEqual(player.diverged, 1)
+        self.assertEqual(player.take(Timeline.SCROLL_DELAY, 1000, -1), -1)
+        self.assertEqual(player.exhausted, 1)
+        self.assertEqual(player.remaining(), 0)
+
+    def test_sparse_events_match_by_time(self):
+        Timeline = sim_module.Timeline
+        recorder = sim_module.TimelineRecorder(self.path("t.bin"))
+        recorder.record(Timeline.SCROLL_RESYNC, 100, 40)
+        recorder.record(Timeline.SCROLL_RESYNC, 900, 60)
+        recorder.close()
+        player = sim_module.TimelinePlayer(self.path("t.bin"))
+        self.assertIsNone(player.seed)
+        self.assertEqual(player.take_if(Timeline.SCROLL_RESYNC, 50, 0), 0)
+        self.assertEqual(player.take_if(Timeline.SCROLL_RESYNC, 100, 0), 40)
+        self.assertEqual(player.take_if(Timeline.SCROLL_RESYNC, 1000, 0), 0)  # 900 那条已经错过
+        self.assertEqual(player.diverged, 1)
+
+    def test_truncated_record_is_ignored(self):
+        recorder = sim_module.TimelineRecorder(self.path("t.bin"), seed=1)
+        recorder.record(sim_module.Timeline.ERROR_LINE, 0, 3)
+        recorder.close()
+        with open(self.path("t.bin"), "ab") as f:
+            f.write(b"\x01\x02")
+        self.assertEqual(sim_module.TimelinePlayer(self.path("t.bin")).count, 1)
+
+    def test_rejects_other_files(self):
+        with open(self.path("t.bin"), "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            sim_module.TimelinePlayer(self.path("t.bin"))
+
+
+class StallArgumentTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(sim_module._parse_stall("50:2.5"), (50, 2.5))
+        for bad in ("50", "x:1", "50:abc", "101:1", "50:-1", "50:inf"):
+            with self.subTest(bad=bad), self.assertRaises(argparse.ArgumentTypeError):
+                sim_module._parse_stall(bad)
+
+
+@unittest.skipUnless(importlib.util.find_spec("PIL"), "Pillow is not installed")
+class RecordReplayTest(TimelineTestCase):
+    SIZE = (640, 360)
+
+    def record(self, name, render_delay, until=20.0):
+        """录制一段；每渲染一行错误文本都让虚拟时钟多走 render_delay 秒，模拟渲染耗时"""
+        path = self.path(name)
+        sim = sim_module.HeadlessErrorSimulator(*self.SIZE, seed=5, name_prefetch=0, record_path=path)
+        add_line = sim.add_line
+
+        def slow_add_line():
+            add_line()
+            sim.virtual_time += render_delay
+
+        sim.add_line = slow_add_line
+        try:
+            frame = sim.render_frame(until).tobytes()
+        finally:
+            sim.shutdown()
+        with open(path, "rb") as f:
+            return f.read(), frame
+
+    def test_recording_does_not_depend_on_render_time(self):
+        fast, _ = self.record("fast.bin", 0.0)
+        for delay in (0.004, 0.012):
+            with self.subTest(delay=delay):
+                slow, _ = self.record(f"slow-{delay}.bin", delay)
+                self.assertEqual(slow, fast)
+
+    def test_replay_reproduces_the_recorded_frame(self):
+        _, recorded = self.record("t.bin", 0.0)
+        sim = sim_module.HeadlessErrorSimulator(*self.SIZE, seed=123, name_prefetch=0,
+                                                replay_path=self.path("t.bin"))
+        try:
+            self.assertEqual(sim.render_frame(20.0).tobytes(), recorded)
+            self.assertEqual(sim.replay.diverged, 0)
+        finally:
+            sim.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()